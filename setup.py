@@ -21,9 +21,9 @@ import sys
 version = "1.3.0"
 
 sys.path.append(".")
-if sys.version_info[0] < 3 or sys.version_info[1] < 5: 
+if sys.version_info < (3, 7):
     print("------------------------------")
-    print("Must use python 3.5 or greater", file=sys.stderr)
+    print("Must use python 3.7 or greater", file=sys.stderr)
     print("Found python version ", sys.version_info, file=sys.stderr)
     print("Installation aborted", file=sys.stderr)
     print("------------------------------")
@@ -64,5 +64,10 @@ setup(
         "websockets",
         "lace"
     ],
+    extras_require={
+        "fast": ["orjson"],
+        "history": ["numpy"]
+    },
+    python_requires=">=3.7",
     cmdclass={'test': tester },
 )
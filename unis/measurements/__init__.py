@@ -1,4 +1,6 @@
 from unis.measurements.data import (
-    DataCollection, Function,
-    Max, Min, Mean, Jitter, Last
+    DataCollection, DataRouter, DataWriter, Function,
+    Max, Min, Mean, Jitter, Last,
+    Windowed, WindowMean, WindowMin, WindowMax,
+    EWMA, Quantile, QuantileSketch
 )
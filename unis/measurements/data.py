@@ -1,13 +1,17 @@
-import asyncio, math, time
+import asyncio, math, threading, time
 
 from unis.rest import UnisProxy
 from unis.utils import Events, asynchronous
 
-from collections import defaultdict
-from lace.logging import trace
-from threading import Timer
+from collections import defaultdict, deque
+from lace.logging import trace, getLogger
 from urllib.parse import urlparse
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 @trace("unis.data")
 class Function(object):
     """
@@ -55,6 +59,21 @@ class Function(object):
         Apply the computation to the value recieved from the stream.
         """
         return self._fn(x, self._prior)
+    def apply_batch(self, values, timestamps):
+        """
+        :param values: New readings from the measurement in the order received.
+        :param timestamps: Timestamps of the readings.
+        :type values: numpy.ndarray[float]
+        :type timestamps: numpy.ndarray[int]
+        :returns: Number value of the streaming computation after all readings.
+        
+        Apply the computation to many readings at once.  The default implementation
+        calls :meth:`Function.apply <unis.measurements.data.Function.apply>` for each reading;
+        inheriting classes may override it with a vectorized equivalent.
+        """
+        for x, ts in zip(values.tolist(), timestamps.tolist()):
+            self.prior = self.apply(x, ts)
+        return self.prior
     def postprocess(self, x):
         """
         :param number x: The most recently computed result.
@@ -77,6 +96,8 @@ class Last(Function):
     """
     def apply(self, x, ts):
         return x
+    def apply_batch(self, values, timestamps):
+        return float(values[-1])
 @trace("unis.data")
 class Min(Function):
     """
@@ -86,6 +107,8 @@ class Min(Function):
         super(Min, self).__init__(None, math.inf)
     def apply(self, x, ts):
         return min(self.prior, x)
+    def apply_batch(self, values, timestamps):
+        return min(self.prior, float(values.min()))
 @trace("unis.data")
 class Max(Function):
     """
@@ -93,6 +116,8 @@ class Max(Function):
     """
     def apply(self, x, ts):
         return max(self.prior, x)
+    def apply_batch(self, values, timestamps):
+        return max(self.prior, float(values.max()))
 @trace("unis.data")
 class Mean(Function):
     """
@@ -104,6 +129,9 @@ class Mean(Function):
     def apply(self, x, ts):
         self.count, self.total = self.count+1, self.total+x
         return self.total / self.count
+    def apply_batch(self, values, timestamps):
+        self.count, self.total = self.count+len(values), self.total+float(values.sum())
+        return self.total / self.count
 @trace("unis.data")
 class Jitter(Function):
     """
@@ -117,9 +145,485 @@ class Jitter(Function):
         delta = x - self.mean
         self.mean += delta / self.count
         return self.prior + (delta * (x - self.mean))
+    def apply_batch(self, values, timestamps):
+        n, mean = len(values), float(values.mean())
+        delta, total = mean - self.mean, self.count + n
+        m2 = float(((values - mean) ** 2).sum())
+        result = self.prior + m2 + delta ** 2 * self.count * n / total
+        self.count, self.mean = total, self.mean + delta * n / total
+        return result
     def postprocess(self, x):
         return x / max(self.count - 1, 1)
 
+@trace("unis.data")
+class Windowed(Function):
+    """
+    :param int count: (optional) Number of most recent readings in the window.
+    :param float duration: (optional) Width of the window in seconds, relative to the newest reading.
+    :param str name: (optional) The name of the function.
+    
+    Base class for computations over a sliding window of readings.  Readings leave the window
+    once more than **count** newer readings have arrived or once they are more than **duration**
+    seconds older than the newest reading.  At least one of **count** or **duration** must be given.
+    
+    Inheriting classes override :meth:`push <unis.measurements.data.Windowed.push>` and
+    :meth:`pop <unis.measurements.data.Windowed.pop>` to maintain their result incrementally.
+    """
+    def __init__(self, count=None, duration=None, name=None, initial=0):
+        if not (count or duration):
+            raise ValueError("Windowed functions require a count or a duration")
+        super(Windowed, self).__init__(None, initial, name)
+        self.count, self.duration = count, duration and int(duration * 1000000)
+        self._window = deque()
+    def apply(self, x, ts):
+        ts = int(ts)
+        self._window.append((ts, x))
+        self.push(x, ts)
+        while (self.count and len(self._window) > self.count) or \
+              (self.duration and self._window[0][0] <= ts - self.duration):
+            self.pop(*self._window.popleft())
+        return self.result()
+    def push(self, x, ts):
+        """
+        :param number x: Reading entering the window.
+        :param int ts: Timestamp of the reading.
+        """
+        pass
+    def pop(self, ts, x):
+        """
+        :param int ts: Timestamp of the reading.
+        :param number x: Reading leaving the window.
+        """
+        pass
+    def result(self):
+        """
+        :returns: Number value of the computation over the current window.
+        """
+        raise NotImplementedError()
+@trace("unis.data")
+class WindowMean(Windowed):
+    """
+    Return the mean of the readings in the window.
+    """
+    def __init__(self, count=None, duration=None, name=None):
+        super(WindowMean, self).__init__(count, duration, name)
+        self.total = 0
+    def push(self, x, ts):
+        self.total += x
+    def pop(self, ts, x):
+        self.total -= x
+    def result(self):
+        return self.total / len(self._window)
+class _Extremum(Windowed):
+    def __init__(self, count=None, duration=None, name=None):
+        super(_Extremum, self).__init__(count, duration, name)
+        self._candidates, self._pushed, self._popped = deque(), 0, 0
+    def push(self, x, ts):
+        while self._candidates and not self._better(self._candidates[-1][1], x):
+            self._candidates.pop()
+        self._candidates.append((self._pushed, x))
+        self._pushed += 1
+    def pop(self, ts, x):
+        if self._candidates[0][0] == self._popped:
+            self._candidates.popleft()
+        self._popped += 1
+    def result(self):
+        return self._candidates[0][1]
+@trace("unis.data")
+class WindowMin(_Extremum):
+    """
+    Return the minimum of the readings in the window.
+    """
+    def _better(self, a, b):
+        return a < b
+@trace("unis.data")
+class WindowMax(_Extremum):
+    """
+    Return the maximum of the readings in the window.
+    """
+    def _better(self, a, b):
+        return a > b
+
+@trace("unis.data")
+class EWMA(Function):
+    """
+    :param float alpha: (optional) Weight given to each new reading.
+    :param float halflife: (optional) Time in seconds for a reading's weight to fall by half.
+    :param str name: (optional) The name of the function.
+    
+    Return the exponentially weighted moving average of the stream.  With **alpha** each reading
+    receives the same weight regardless of spacing.  With **halflife** the weight depends on the time
+    elapsed since the previous reading, suitable for irregularly sampled measurements.
+    """
+    def __init__(self, alpha=None, halflife=None, name=None):
+        if (alpha is None) == (halflife is None):
+            raise ValueError("EWMA requires exactly one of alpha or halflife")
+        super(EWMA, self).__init__(None, None, name)
+        self.alpha, self.halflife = alpha, halflife and halflife * 1000000
+        self._last = None
+    def apply(self, x, ts):
+        ts = int(ts)
+        if self.prior is None:
+            self._last = ts
+            return x
+        alpha = self.alpha
+        if self.halflife:
+            alpha = 1 - 0.5 ** (max(ts - self._last, 0) / self.halflife)
+            self._last = max(self._last, ts)
+        return self.prior + alpha * (x - self.prior)
+
+@trace("unis.data")
+class QuantileSketch(object):
+    """
+    :param float accuracy: (optional) Relative accuracy of the reported quantiles.
+    :param int max_buckets: (optional) Upper bound on the number of buckets held.
+    
+    Mergeable quantile summary with bounded memory.  Readings are counted in logarithmically
+    sized buckets so that any reported quantile is within **accuracy** of the true value, relative
+    to its magnitude.  When more than **max_buckets** buckets are in use the smallest are combined,
+    sacrificing accuracy only for the lowest quantiles.  Sketches built with the same **accuracy**
+    may be combined with :meth:`merge <unis.measurements.data.QuantileSketch.merge>`.
+    """
+    def __init__(self, accuracy=0.01, max_buckets=2048):
+        self.accuracy, self.max_buckets = accuracy, max_buckets
+        self._gamma = (1 + accuracy) / (1 - accuracy)
+        self._lg = math.log(self._gamma)
+        self._buckets, self.zeros, self.count = defaultdict(int), 0, 0
+    def __len__(self):
+        return self.count
+    def _key(self, x):
+        return (1 if x > 0 else -1, int(math.ceil(math.log(abs(x)) / self._lg)))
+    def _value(self, k):
+        return k[0] * 2 * self._gamma ** k[1] / (self._gamma + 1)
+    def add(self, x, n=1):
+        """
+        :param number x: Reading to record.
+        :param int n: (optional) Number of times to record the reading.
+        """
+        self.count += n
+        if x == 0:
+            self.zeros += n
+            return
+        self._buckets[self._key(x)] += n
+        if len(self._buckets) > self.max_buckets:
+            self._collapse()
+    def remove(self, x, n=1):
+        """
+        :param number x: Reading previously recorded with :meth:`add <unis.measurements.data.QuantileSketch.add>`.
+        :param int n: (optional) Number of times to remove the reading.
+
+        Readings that were never recorded are ignored once the sketch is empty.
+        """
+        if x == 0:
+            n = min(n, self.zeros)
+            self.count -= n
+            self.zeros -= n
+            return
+        k = self._key(x)
+        if k not in self._buckets:
+            if not self._buckets:
+                return
+            k = self._floor()
+        self.count -= n
+        self._buckets[k] -= n
+        if self._buckets[k] <= 0:
+            del self._buckets[k]
+    def merge(self, other):
+        """
+        :param other: Sketch to combine into this sketch.
+        :type other: :class:`QuantileSketch <unis.measurements.data.QuantileSketch>`
+        :returns: This sketch.
+        """
+        if other._gamma != self._gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        self.count, self.zeros = self.count + other.count, self.zeros + other.zeros
+        for k, n in other._buckets.items():
+            self._buckets[k] += n
+        if len(self._buckets) > self.max_buckets:
+            self._collapse()
+        return self
+    def quantile(self, q):
+        """
+        :param float q: Quantile to compute in the range [0, 1].
+        :returns: Estimated value at the quantile, or ``None`` if the sketch is empty.
+        """
+        if not self.count:
+            return None
+        rank, seen = q * (self.count - 1), 0
+        for k, v in self._ordered():
+            seen += self.zeros if k is None else self._buckets[k]
+            if seen > rank:
+                return v
+        return v
+    def _ordered(self):
+        values = [(self._value(k), k) for k in self._buckets.keys()]
+        if self.zeros:
+            values.append((0, None))
+        return [(k, v) for v, k in sorted(values, key=lambda p: p[0])]
+    def _floor(self):
+        return min(self._buckets.keys(), key=self._value)
+    def _collapse(self):
+        ordered = [k for k, _ in self._ordered() if k is not None]
+        excess = len(ordered) - self.max_buckets + 1
+        target = ordered[excess]
+        for k in ordered[:excess]:
+            self._buckets[target] += self._buckets.pop(k)
+
+@trace("unis.data")
+class Quantile(Function):
+    """
+    :param float q: (optional) Quantile to report in the range [0, 1].
+    :param int count: (optional) Number of most recent readings to consider.
+    :param float duration: (optional) Width of the window in seconds.
+    :param float accuracy: (optional) Relative accuracy of the reported quantile.
+    :param str name: (optional) The name of the function.
+    
+    Return an estimate of the **q** quantile of the stream using a
+    :class:`QuantileSketch <unis.measurements.data.QuantileSketch>`.  When **count** or
+    **duration** is provided, only the readings in the corresponding sliding window are
+    considered.  Time windows are tracked in ten slices, so readings expire in steps of
+    one tenth of the window rather than individually.
+    """
+    SLICES = 10
+    def __init__(self, q=0.5, count=None, duration=None, accuracy=0.01, name=None):
+        super(Quantile, self).__init__(None, None, name)
+        self.q, self.accuracy = q, accuracy
+        self.count, self.duration = count, duration and int(duration * 1000000)
+        self._window, self._slices = deque(), deque()
+        self._sketch = QuantileSketch(accuracy)
+    def sketch(self):
+        """
+        :returns: :class:`QuantileSketch <unis.measurements.data.QuantileSketch>` of the readings in the window.
+        
+        Sketches from several :class:`Quantiles <unis.measurements.data.Quantile>` with the same accuracy
+        may be merged to find quantiles across measurements.
+        """
+        if not self.duration:
+            return self._sketch
+        result = QuantileSketch(self.accuracy)
+        for _, s in self._slices:
+            result.merge(s)
+        return result
+    def apply(self, x, ts):
+        ts = int(ts)
+        if self.duration:
+            width = max(self.duration // self.SLICES, 1)
+            start = ts - ts % width
+            if not self._slices or self._slices[-1][0] < start:
+                self._slices.append((start, QuantileSketch(self.accuracy)))
+            self._slices[-1][1].add(x)
+            while self._slices[0][0] + width <= ts - self.duration:
+                self._slices.popleft()
+        else:
+            self._sketch.add(x)
+            if self.count:
+                self._window.append(x)
+                if len(self._window) > self.count:
+                    self._sketch.remove(self._window.popleft())
+        return self.prior
+    def postprocess(self, x):
+        return self.sketch().quantile(self.q)
+
+@trace("unis.data")
+class DataWriter(object):
+    """
+    Shared writer for measurement readings appended through
+    :meth:`DataCollection.append <unis.measurements.data.DataCollection.append>`.
+    Readings are queued per data store and sent from a background thread; each request carries
+    the readings of every measurement pending for that data store.  A data store's queue is sent
+    once it holds ``measurements.batch_size`` readings or once its oldest reading has waited
+    ``measurements.batch_until`` milliseconds.  Readings arriving while a request is in flight
+    are combined into the next request.
+
+    Readings from a failed request are queued again ahead of newer readings and retried after
+    :attr:`RETRY_DELAY` seconds, up to :attr:`RETRIES` times, before they are dropped.  Dropped
+    readings are reported by the next :meth:`flush <unis.measurements.data.DataWriter.flush>`.
+    """
+    RETRIES, RETRY_DELAY = 3, 1.0
+    _instance = None
+    _create = threading.Lock()
+    
+    @classmethod
+    def get(cls):
+        """
+        :returns: The process wide :class:`DataWriter <unis.measurements.data.DataWriter>`.
+        """
+        with cls._create:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+    
+    def __init__(self):
+        self._cv = threading.Condition()
+        self._pending, self._counts = defaultdict(lambda: defaultdict(list)), defaultdict(int)
+        self._deadlines, self._ready, self._inflight = {}, set(), 0
+        self._attempts, self._errors = defaultdict(int), []
+        self._thread = None
+    
+    def submit(self, source, mid, record, size=0, delay=0):
+        """
+        :param source: Data store receiving the reading.
+        :param str mid: Identifier of the measurement metadata.
+        :param dict record: Reading containing ``ts`` and ``value``.
+        :param int size: (optional) Readings to queue before sending.
+        :param int delay: (optional) Milliseconds a reading may wait before sending.
+        :type source: :class:`CID <unis.rest.unis_client.CID>`
+        """
+        with self._cv:
+            self._pending[source][mid].append(record)
+            self._counts[source] += 1
+            if self._counts[source] >= size:
+                self._ready.add(source)
+            elif delay and source not in self._deadlines:
+                self._deadlines[source] = time.monotonic() + delay / 1000.0
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="unis-data-writer")
+                self._thread.start()
+            self._cv.notify()
+    
+    def flush(self):
+        """
+        :raises ConnectionError: If readings could not be sent after :attr:`RETRIES` attempts.
+        
+        Send all queued readings and wait for requests in flight to complete.  Failed requests
+        are retried before the call returns.
+        """
+        while True:
+            with self._cv:
+                self._cv.wait_for(lambda: not self._inflight)
+                batches = self._take(list(self._pending.keys()))
+            if not batches:
+                break
+            e = self._post(batches)
+            if e is not None:
+                with self._cv:
+                    self._requeue(batches, e)
+                time.sleep(self.RETRY_DELAY)
+        with self._cv:
+            errors, self._errors = self._errors, []
+        if errors:
+            raise ConnectionError("Failed to send measurements - {}".format("; ".join(errors)))
+    
+    def _take(self, sources):
+        batches = {}
+        for source in sources:
+            mids = self._pending.pop(source, None)
+            self._counts.pop(source, None)
+            self._deadlines.pop(source, None)
+            self._ready.discard(source)
+            if mids:
+                batches[(source, "data")] = [{'mid': mid, 'data': data} for mid, data in mids.items()]
+        return batches
+    
+    def _post(self, batches):
+        if not batches:
+            return None
+        try:
+            UnisProxy.post(batches)
+        except Exception as e:
+            getLogger("unisrt").warn("Failed to send {} measurement batches - {}".format(len(batches), e))
+            return e
+        with self._cv:
+            [self._attempts.pop(source, None) for source, _ in batches.keys()]
+        return None
+    
+    def _requeue(self, batches, e):
+        retry = time.monotonic() + self.RETRY_DELAY
+        for (source, _), items in batches.items():
+            self._attempts[source] += 1
+            if self._attempts[source] > self.RETRIES:
+                del self._attempts[source]
+                msg = "{} readings for {} - {}".format(sum(len(i['data']) for i in items), source, e)
+                getLogger("unisrt").error("Dropping measurements after {} attempts, {}".format(self.RETRIES + 1, msg))
+                self._errors.append(msg)
+                continue
+            for item in items:
+                self._pending[source][item['mid']][:0] = item['data']
+                self._counts[source] += len(item['data'])
+            self._deadlines[source] = min(self._deadlines.get(source, retry), retry)
+    
+    def _run(self):
+        while True:
+            with self._cv:
+                while True:
+                    now = time.monotonic()
+                    due = self._ready | set(s for s, t in self._deadlines.items() if t <= now)
+                    if due:
+                        break
+                    self._cv.wait(min(self._deadlines.values()) - now if self._deadlines else None)
+                batches = self._take(due)
+                self._inflight += 1
+            e = None
+            try:
+                e = self._post(batches)
+            finally:
+                with self._cv:
+                    if e is not None:
+                        self._requeue(batches, e)
+                    self._inflight -= 1
+                    self._cv.notify_all()
+
+@trace("unis.data")
+class DataRouter(object):
+    """
+    Shared subscription for measurement readings pushed by data stores.  Each data store
+    receives a single subscription to its ``data`` channel regardless of the number of
+    :class:`DataCollections <unis.measurements.data.DataCollection>` following it; incoming
+    messages are routed to collections by measurement identifier and each collection processes
+    its readings from a message as one batch.
+
+    The router is used only when the ``measurements.multiplex`` setting is enabled, as it
+    depends on the data store publishing readings to the ``data`` channel.
+    """
+    _instance = None
+    _create = threading.Lock()
+    
+    @classmethod
+    def get(cls):
+        """
+        :returns: The process wide :class:`DataRouter <unis.measurements.data.DataRouter>`.
+        """
+        with cls._create:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+    
+    def __init__(self):
+        self._routes, self._lock = {}, threading.Lock()
+        self._unis = UnisProxy("data")
+    
+    def follow(self, collection):
+        """
+        :param collection: Collection to receive readings for its measurement.
+        :type collection: :class:`DataCollection <unis.measurements.data.DataCollection>`
+        """
+        source, new = collection._source, False
+        with self._lock:
+            if source not in self._routes:
+                self._routes[source], new = {}, True
+            self._routes[source][collection._md.id] = collection
+        if new:
+            asynchronous.make_async(self._unis.subscribe, [source], lambda v, action: self._dispatch(source, v))
+    
+    def unfollow(self, collection):
+        """
+        :param collection: Collection to stop receiving readings.
+        :type collection: :class:`DataCollection <unis.measurements.data.DataCollection>`
+        """
+        with self._lock:
+            routes = self._routes.get(collection._source, {})
+            if routes.get(collection._md.id) is collection:
+                del routes[collection._md.id]
+    
+    def _dispatch(self, source, v):
+        routes = self._routes.get(source, {})
+        if 'mid' in v and 'data' in v:
+            v = { v['mid']: v['data'] }
+        for mid, records in v.items():
+            collection = routes.get(mid)
+            if collection is not None:
+                collection._receive(records)
+
 @trace("unis.data")
 class DataCollection(object):
     """ 
@@ -129,7 +633,11 @@ class DataCollection(object):
     :type rt: :class:`Runtime <unis.runtime.runtime.Runtime>`
     :type fns: list[callable or :class:`Function <unis.measurements.data.Function>`]
     
-    Collection of measurement values from a specific remote data source.
+    Collection of measurement values from a specific remote data source.  When the
+    ``measurements.history`` setting is non-zero, the most recent readings are also kept in
+    :attr:`history`, a :class:`History <unis.measurements.history.History>` of that capacity.
+    When ``measurements.rollups`` lists ``[interval, retention]`` pairs, downsampled summaries
+    are maintained in :attr:`rollup`, a :class:`Rollup <unis.measurements.rollup.Rollup>`.
     """
     def __init__(self, md, rt, fns=None):
         self._source = md.getSource()
@@ -137,11 +645,21 @@ class DataCollection(object):
         self._md = md
         self._len, self._fns, self._rt = 0, {}, rt
         self._at = 0 if rt.settings["measurements"]["read_history"] else int(time.time() * 1000000)
-        self._pending = []
         self._batch = int(rt.settings["measurements"].get("batch_size", 0))
         self._batch_delay = int(rt.settings["measurements"].get("batch_until", 0))
-        self._timer = None
+        self._page_size = int(rt.settings["measurements"].get("page_size", 10000))
+        self._threads = int(rt.settings["proxy"].get("threads", 10))
+        self._dup = 0
+        self._lock, self._live, self._bound = threading.RLock(), None, None
         self.read_only = False
+        self.history = None
+        if rt.settings["measurements"].get("history", 0):
+            from unis.measurements.history import History
+            self.history = History(rt.settings["measurements"]["history"])
+        self.rollup = None
+        if rt.settings["measurements"].get("rollups", []):
+            from unis.measurements.rollup import Rollup
+            self.rollup = Rollup(rt.settings["measurements"]["rollups"])
         
         if not rt.settings["measurements"]["subscribe"]:
             self._subscribe = lambda: False
@@ -158,25 +676,13 @@ class DataCollection(object):
         :param Any val: The value to append to the measurement
         :param int ts: The timestamp of the measurement in microseconds
 
-        Add a data point to the corresponding measurement.
+        Add a data point to the corresponding measurement.  Data points are sent to the data
+        store asynchronously by the shared :class:`DataWriter <unis.measurements.data.DataWriter>`.
         """
-        def cb():
-            if self._pending:
-                self._push()
-            self._timer = None
-
         if self.read_only:
             raise AttributeError("Dataset is read only until measurement is flushed")
-        self._pending.append({'ts': ts or int(time.time() * 1000000), 'value': val})
-        if len(self._pending) >= self._batch:
-            self._push()
-        elif self._batch_delay and not self._timer:
-            self._timer = Timer(self._batch_delay / 1000.0, cb)
-
-    def _push(self):
-        data = {'mid': self._md.id, 'data': self._pending}
-        self._unis.post({(self._source, self._unis._name): [data]})
-        self._pending = []
+        record = {'ts': ts or int(time.time() * 1000000), 'value': val}
+        DataWriter.get().submit(self._source, self._md.id, record, self._batch, self._batch_delay)
         
     def attachFunction(self, fn, name="", doc=""):
         """
@@ -192,23 +698,116 @@ class DataCollection(object):
     def __len__(self):
         return self._len
     def _process(self, record):
-        self._len += 1
-        self._at = max(self._at, int(record['ts']))
-        for f in self._fns.values():
-            f.prior = f.apply(float(record['value']), record['ts'])
+        with self._lock:
+            self._len += 1
+            ts, value = int(record['ts']), float(record['value'])
+            self._at = max(self._at, ts)
+            if self.history is not None:
+                self.history.append(ts, value)
+            if self.rollup is not None:
+                self.rollup.append(ts, value)
+            for f in self._fns.values():
+                f.prior = f.apply(value, record['ts'])
         self._md.getCollection()._serve(Events.data, self._md)
+    def _process_batch(self, records):
+        if np is None:
+            return list(map(self._process, records))
+        if not records:
+            return
+        ts = np.array([r['ts'] for r in records], dtype=np.int64)
+        values = np.array([r['value'] for r in records], dtype=np.float64)
+        with self._lock:
+            self._len += len(records)
+            self._at = max(self._at, int(ts.max()))
+            if self.history is not None:
+                self.history.extend(ts, values)
+            if self.rollup is not None:
+                self.rollup.extend(ts, values)
+            for f in self._fns.values():
+                f.prior = f.apply_batch(values, ts)
+        self._md.getCollection()._serve(Events.data, self._md)
+    def _receive(self, records):
+        # Readings pushed while history is paged in are held until paging completes
+        with self._lock:
+            if self._live is None:
+                return self._process_batch(records)
+            if records:
+                ts = min(int(r['ts']) for r in records)
+                self._bound = ts if self._bound is None else min(self._bound, ts)
+            self._live.append(records)
     def _subscribe(self):
-        def cb(v, action):
-            sets = list(v.values())
-            for s in sets:
-                list(map(self._process, s))
-        asynchronous.make_async(self._unis.subscribe, [self._source], cb)
+        with self._lock:
+            self._live = []
+        if self._rt.settings["measurements"]["multiplex"]:
+            DataRouter.get().follow(self)
+        else:
+            def cb(v, action):
+                for s in v.values():
+                    self._receive(s)
+            asynchronous.make_async(self._unis.subscribe, [self._source], cb)
         self._subscribe = lambda: True
         return False
     
-    def load(self):
+    def load(self, progress=None):
+        """
+        :param callable progress: (optional) Called after each page with the collection and the number of readings loaded so far.
+        
+        Read measurements from the data store that have not yet been processed.  Readings are requested
+        in pages of at most ``measurements.page_size`` and each page is processed before the next is
+        requested, so memory use does not grow with the length of the history.  Readings pushed by the
+        subscription while pages are outstanding are processed once paging completes; paging stops at
+        the earliest of them so no reading is processed twice.
+        """
         if not self._subscribe():
-            kwargs = { "sort": "ts:1", "ts": "gt={}".format(self._at) }
-            data = asynchronous.make_async(self._unis.get, [self._source], **kwargs)
-            list(map(self._process, data))
+            asynchronous.make_async(self._load_pages, progress)
+
+    @classmethod
+    def load_many(cls, collections, progress=None):
+        """
+        :param collections: Collections to load.
+        :param callable progress: (optional) As in :meth:`load <unis.measurements.data.DataCollection.load>`.
+        :type collections: list[:class:`DataCollection <unis.measurements.data.DataCollection>`]
+        
+        As :meth:`load <unis.measurements.data.DataCollection.load>` for many collections.  Up to
+        ``proxy.threads`` collections are paged concurrently.
+        """
+        pending = [c for c in collections if not c._subscribe()]
+        async def _f():
+            limit = asyncio.Semaphore(max([c._threads for c in pending]))
+            async def _load(c):
+                async with limit:
+                    await c._load_pages(progress)
+            await asyncio.gather(*[_load(c) for c in pending])
+        if pending:
+            asynchronous.make_async(_f)
+
+    async def _load_pages(self, progress=None):
+        loaded, at, dup = 0, self._at, self._dup
+        try:
+            while True:
+                kwargs = { "sort": "ts:1", "limit": str(self._page_size) }
+                if dup:
+                    kwargs.update({ "ts": "gte={}".format(at), "skip": str(dup) })
+                else:
+                    kwargs["ts"] = "gt={}".format(at)
+                page = await self._unis.get([self._source], **kwargs)
+                with self._lock:
+                    bound = self._bound
+                    records = page if bound is None else [r for r in page if int(r['ts']) < bound]
+                    self._process_batch(records)
+                if records:
+                    last = max(int(r['ts']) for r in records)
+                    tail = sum(1 for r in records if int(r['ts']) == last)
+                    at, dup = (at, dup + tail) if last == at else (last, tail)
+                loaded += len(records)
+                if progress:
+                    progress(self, loaded)
+                if len(page) < self._page_size or len(records) < len(page):
+                    self._dup = dup if self._at == at else 0
+                    return loaded
+        finally:
+            with self._lock:
+                live, self._live, self._bound = self._live or [], None, None
+                for records in live:
+                    self._process_batch(records)
 
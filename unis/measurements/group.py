@@ -0,0 +1,146 @@
+import numpy as np
+
+from lace.logging import trace
+
+from unis.measurements.data import DataCollection
+
+_BOUNDS = np.iinfo(np.int64)
+_REDUCE = {
+    "sum": lambda v, s, n: np.add.reduceat(v, s),
+    "mean": lambda v, s, n: np.add.reduceat(v, s) / n,
+    "count": lambda v, s, n: n.astype(np.float64),
+    "min": lambda v, s, n: np.minimum.reduceat(v, s),
+    "max": lambda v, s, n: np.maximum.reduceat(v, s),
+}
+
+@trace("unis.data")
+class DataGroup(object):
+    """
+    :param metadata: Metadata whose measurements make up the group.
+    :type metadata: iterable[:class:`Metadata <unis.models.models.Metadata>`]
+
+    Aggregate queries over the readings of many :class:`DataCollections <unis.measurements.data.DataCollection>`
+    at once.  Queries read the collections' :class:`History <unis.measurements.history.History>` buffers,
+    which requires the ``measurements.history`` setting, and evaluate aggregates over the combined
+    arrays rather than per collection::
+
+        group = DataGroup.where(rt, lambda md: md.subject.node == node)
+        throughput = group.aggregate("mean", t0=now - 60 * 1000000)
+
+    Collections are loaded together when the group is created; queries do not reload them.
+    Metadata without a :class:`DataCollection <unis.measurements.data.DataCollection>` are skipped.
+    Aggregates are one of ``mean``, ``sum``, ``count``, ``min``, or ``max``.
+    """
+    def __init__(self, metadata):
+        self.metadata, self.collections = [], []
+        for md in metadata:
+            data = getattr(md, 'data', None)
+            if isinstance(data, DataCollection):
+                self.metadata.append(md)
+                self.collections.append(data)
+        self.refresh()
+
+    @classmethod
+    def where(cls, rt, pred):
+        """
+        :param rt: Runtime containing the metadata.
+        :param pred: Predicate used to select metadata, as in :meth:`UnisCollection.where <unis.models.lists.UnisCollection.where>`.
+        :type rt: :class:`Runtime <unis.runtime.runtime.Runtime>`
+        :type pred: callable or dictionary
+        :returns: :class:`DataGroup <unis.measurements.group.DataGroup>`
+        """
+        return cls(rt.metadata.where(pred))
+
+    def __len__(self):
+        return len(self.collections)
+
+    def refresh(self, progress=None):
+        """
+        :param callable progress: (optional) As in :meth:`DataCollection.load <unis.measurements.data.DataCollection.load>`.
+
+        Read readings not yet processed by the group's collections.  Collections that are
+        subscribed to their data store are already current and are not requested.
+        """
+        DataCollection.load_many(self.collections, progress)
+
+    def values(self, t0=None, t1=None):
+        """
+        :param int t0: (optional) Start of the range, inclusive.
+        :param int t1: (optional) End of the range, exclusive.
+        :returns: tuple of offset, timestamp, and value arrays.
+        :raises ValueError: If a collection does not keep a history.
+
+        Return the buffered readings of every collection in the range [**t0**, **t1**) as
+        combined arrays.  The readings of collection ``i`` are found at
+        ``offsets[i]:offsets[i + 1]``.
+        """
+        t0, t1 = _BOUNDS.min if t0 is None else t0, _BOUNDS.max if t1 is None else t1
+        ts, values = [], []
+        for md, c in zip(self.metadata, self.collections):
+            if c.history is None:
+                raise ValueError("Measurement {} does not keep a history".format(md.id))
+            a, b = c.history.between(t0, t1)
+            ts.append(a)
+            values.append(b)
+        offsets = np.cumsum([0] + [len(a) for a in ts])
+        if not ts:
+            return offsets, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        return offsets, np.concatenate(ts), np.concatenate(values)
+
+    def aggregate(self, how="mean", t0=None, t1=None):
+        """
+        :param str how: (optional) Aggregate to compute.
+        :param int t0: (optional) Start of the range, inclusive.
+        :param int t1: (optional) End of the range, exclusive.
+        :returns: The aggregate over all readings in the range, or None if there are none.
+        """
+        reduce = self._reducer(how)
+        _, _, values = self.values(t0, t1)
+        if not len(values):
+            return None
+        return float(reduce(values, np.zeros(1, dtype=np.int64), np.array([len(values)]))[0])
+
+    def each(self, how="mean", t0=None, t1=None):
+        """
+        :param str how: (optional) Aggregate to compute.
+        :param int t0: (optional) Start of the range, inclusive.
+        :param int t1: (optional) End of the range, exclusive.
+        :returns: dictionary mapping metadata identifiers to the aggregate of their readings.
+
+        Compute the aggregate of each collection's readings in the range.  Collections without
+        readings in the range are omitted.
+        """
+        reduce = self._reducer(how)
+        offsets, _, values = self.values(t0, t1)
+        counts = np.diff(offsets)
+        keep = np.flatnonzero(counts)
+        if not len(keep):
+            return {}
+        result = reduce(values, offsets[keep], counts[keep])
+        return {self.metadata[i].id: float(v) for i, v in zip(keep, result)}
+
+    def resample(self, interval, how="mean", t0=None, t1=None):
+        """
+        :param int interval: Width of each bucket in microseconds.
+        :param str how: (optional) Aggregate to compute per bucket.
+        :param int t0: (optional) Start of the range, inclusive.
+        :param int t1: (optional) End of the range, exclusive.
+        :returns: tuple of bucket start timestamps and aggregate values.
+
+        Aggregate the readings of all collections into buckets of **interval** microseconds
+        aligned to multiples of **interval**.  Empty buckets are omitted.
+        """
+        reduce = self._reducer(how)
+        _, ts, values = self.values(t0, t1)
+        if not len(ts):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        buckets = ts // interval
+        order = np.argsort(buckets, kind='stable')
+        buckets, values = buckets[order], values[order]
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        return buckets[starts] * interval, reduce(values, starts, np.diff(np.r_[starts, len(values)]))
+
+    def _reducer(self, how):
+        if how not in _REDUCE:
+            raise ValueError("Unknown group aggregate - {}".format(how))
+        return _REDUCE[how]
@@ -0,0 +1,113 @@
+import numpy as np
+
+from lace.logging import trace
+
+@trace("unis.data")
+class History(object):
+    """
+    :param int capacity: Maximum number of readings retained.
+
+    Fixed capacity record of the most recent (timestamp, value) readings from a
+    :class:`DataCollection <unis.measurements.data.DataCollection>`.  Readings are stored in
+    preallocated arrays; once full, the oldest readings are overwritten.  Query results are
+    returned as a pair of arrays, ``(timestamps, values)``, in the order the readings were received.
+    """
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._ts = np.zeros(self.capacity, dtype=np.int64)
+        self._values = np.zeros(self.capacity, dtype=np.float64)
+        self._head, self._count = 0, 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, ts, value):
+        """
+        :param int ts: Timestamp of the reading in microseconds.
+        :param float value: Value of the reading.
+
+        Record a single reading.
+        """
+        self._ts[self._head], self._values[self._head] = ts, value
+        self._head = (self._head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def extend(self, ts, values):
+        """
+        :param ts: Timestamps of the readings in microseconds.
+        :param values: Values of the readings.
+        :type ts: array-like[int]
+        :type values: array-like[float]
+
+        Record many readings at once.
+        """
+        ts, values = np.asarray(ts, dtype=np.int64)[-self.capacity:], np.asarray(values, dtype=np.float64)[-self.capacity:]
+        n = len(ts)
+        first = min(n, self.capacity - self._head)
+        self._ts[self._head:self._head + first], self._values[self._head:self._head + first] = ts[:first], values[:first]
+        self._ts[:n - first], self._values[:n - first] = ts[first:], values[first:]
+        self._head = (self._head + n) % self.capacity
+        self._count = min(self._count + n, self.capacity)
+
+    def _ordered(self):
+        if self._count < self.capacity:
+            return self._ts[:self._count], self._values[:self._count]
+        return np.roll(self._ts, -self._head), np.roll(self._values, -self._head)
+
+    def last(self, n):
+        """
+        :param int n: Number of readings to return.
+        :returns: tuple of timestamp and value arrays.
+
+        Return the **n** most recent readings.
+        """
+        ts, values = self._ordered()
+        n = min(max(int(n), 0), len(ts))
+        return ts[len(ts) - n:].copy(), values[len(ts) - n:].copy()
+
+    def between(self, t0, t1):
+        """
+        :param int t0: Start of the range, inclusive.
+        :param int t1: End of the range, exclusive.
+        :returns: tuple of timestamp and value arrays.
+
+        Return the readings with timestamps in the range [**t0**, **t1**).
+        """
+        ts, values = self._ordered()
+        mask = (ts >= t0) & (ts < t1)
+        return ts[mask], values[mask]
+
+    def resample(self, interval, how="mean", t0=None, t1=None):
+        """
+        :param int interval: Width of each bucket in microseconds.
+        :param str how: (optional) Aggregate to compute per bucket, one of ``mean``, ``sum``, ``count``, ``min``, ``max``, or ``last``.
+        :param int t0: (optional) Start of the range, inclusive.
+        :param int t1: (optional) End of the range, exclusive.
+        :returns: tuple of bucket start timestamps and aggregate values.
+
+        Aggregate readings into buckets of **interval** microseconds aligned to multiples of **interval**.
+        Empty buckets are omitted.
+        """
+        ts, values = self._ordered()
+        if t0 is not None or t1 is not None:
+            bounds = np.iinfo(np.int64)
+            mask = (ts >= (bounds.min if t0 is None else t0)) & (ts < (bounds.max if t1 is None else t1))
+            ts, values = ts[mask], values[mask]
+        if not len(ts):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        buckets = ts // interval
+        order = np.argsort(buckets, kind='stable')
+        buckets, values = buckets[order], values[order]
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        counts = np.diff(np.r_[starts, len(buckets)])
+        result = {
+            "sum": lambda: np.add.reduceat(values, starts),
+            "mean": lambda: np.add.reduceat(values, starts) / counts,
+            "count": lambda: counts.astype(np.float64),
+            "min": lambda: np.minimum.reduceat(values, starts),
+            "max": lambda: np.maximum.reduceat(values, starts),
+            "last": lambda: values[starts + counts - 1],
+        }
+        if how not in result:
+            raise ValueError("Unknown resample aggregate - {}".format(how))
+        return buckets[starts] * interval, result[how]()
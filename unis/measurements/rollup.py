@@ -0,0 +1,240 @@
+import numpy as np
+
+from lace.logging import trace
+
+def _group(keys):
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return order, keys[starts], starts
+
+@trace("unis.data")
+class Tier(object):
+    """
+    :param int interval: Width of each bucket in microseconds.
+    :param int retention: Maximum number of buckets retained.
+
+    A single resolution of a :class:`Rollup <unis.measurements.rollup.Rollup>`.  Each bucket
+    holds the count, sum, minimum, and maximum of the readings whose timestamps fall within
+    it.  Buckets are kept in preallocated arrays; once **retention** buckets are held, the
+    oldest bucket is overwritten.
+    """
+    def __init__(self, interval, retention):
+        self.interval, self.retention = int(interval), int(retention)
+        self._bucket = np.zeros(self.retention, dtype=np.int64)
+        self._count = np.zeros(self.retention, dtype=np.int64)
+        self._sum = np.zeros(self.retention, dtype=np.float64)
+        self._min = np.zeros(self.retention, dtype=np.float64)
+        self._max = np.zeros(self.retention, dtype=np.float64)
+        self._head, self._len = 0, 0
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def oldest(self):
+        """
+        :returns: Start timestamp of the oldest retained bucket, or None if the tier is empty.
+        """
+        if not self._len:
+            return None
+        return int(self._bucket[(self._head - self._len) % self.retention]) * self.interval
+
+    def _slot(self, bucket):
+        if self._len:
+            last = (self._head - 1) % self.retention
+            if self._bucket[last] == bucket:
+                return last
+            if self._bucket[last] > bucket:
+                ring = self._ring()
+                at = np.searchsorted(self._bucket[ring], bucket)
+                if at < self._len and self._bucket[ring[at]] == bucket:
+                    return int(ring[at])
+                return self._insert(ring, at, bucket)
+        i = self._head
+        self._bucket[i], self._count[i], self._sum[i] = bucket, 0, 0.0
+        self._min[i], self._max[i] = np.inf, -np.inf
+        self._head = (self._head + 1) % self.retention
+        self._len = min(self._len + 1, self.retention)
+        return i
+
+    def _ring(self):
+        return (self._head - self._len + np.arange(self._len)) % self.retention
+
+    def _insert(self, ring, at, bucket):
+        full = self._len == self.retention
+        if full and at == 0:
+            return None
+        columns = [a[ring] for a in (self._bucket, self._count, self._sum, self._min, self._max)]
+        columns = [np.insert(c, at, v) for c, v in zip(columns, (bucket, 0, 0.0, np.inf, -np.inf))]
+        if full:
+            columns, at = [c[1:] for c in columns], at - 1
+        self._len = len(columns[0])
+        for dst, src in zip((self._bucket, self._count, self._sum, self._min, self._max), columns):
+            dst[:self._len] = src
+        self._head = self._len % self.retention
+        return at
+
+    def add(self, bucket, count, total, lo, hi):
+        """
+        :param int bucket: Index of the bucket, the bucket start divided by the interval.
+        :param int count: Number of readings.
+        :param float total: Sum of the readings.
+        :param float lo: Minimum of the readings.
+        :param float hi: Maximum of the readings.
+
+        Merge a summary of readings into a bucket.  When the tier is full, summaries for buckets
+        older than those retained are discarded.
+        """
+        i = self._slot(bucket)
+        if i is not None:
+            self._count[i] += count
+            self._sum[i] += total
+            self._min[i], self._max[i] = min(self._min[i], lo), max(self._max[i], hi)
+
+    def extend(self, buckets, counts, totals, lo, hi):
+        """
+        :param buckets: Bucket indices in ascending order.
+        :param counts: Number of readings per bucket.
+        :param totals: Sum of the readings per bucket.
+        :param lo: Minimum of the readings per bucket.
+        :param hi: Maximum of the readings per bucket.
+
+        Merge bucket summaries into the tier.  Buckets newer than the most recent bucket held
+        are written as a block; any others are merged individually.
+        """
+        last = self._bucket[(self._head - 1) % self.retention] if self._len else np.iinfo(np.int64).min
+        old = np.searchsorted(buckets, last, side='right')
+        for j in range(old):
+            self.add(buckets[j], counts[j], totals[j], lo[j], hi[j])
+        columns = [a[old:][-self.retention:] for a in (buckets, counts, totals, lo, hi)]
+        n = len(columns[0])
+        first = min(n, self.retention - self._head)
+        for dst, src in zip((self._bucket, self._count, self._sum, self._min, self._max), columns):
+            dst[self._head:self._head + first], dst[:n - first] = src[:first], src[first:]
+        self._head = (self._head + n) % self.retention
+        self._len = min(self._len + n, self.retention)
+
+    def buckets(self, t0=None, t1=None):
+        """
+        :param int t0: (optional) Start of the range, inclusive.
+        :param int t1: (optional) End of the range, exclusive.
+        :returns: tuple of bucket start, count, sum, minimum, and maximum arrays.
+
+        Return the retained buckets starting within [**t0**, **t1**) in ascending order.
+        """
+        ring = self._ring()
+        starts = self._bucket[ring] * self.interval
+        mask = np.ones(len(ring), dtype=bool)
+        if t0 is not None: mask &= starts >= t0
+        if t1 is not None: mask &= starts < t1
+        ring = ring[mask]
+        return starts[mask], self._count[ring], self._sum[ring], self._min[ring], self._max[ring]
+
+@trace("unis.data")
+class Rollup(object):
+    """
+    :param tiers: Pairs of bucket interval in microseconds and number of buckets retained.
+    :type tiers: list[tuple[int, int]]
+    :raises ValueError: If no tiers are given or an interval is not a multiple of every finer interval.
+
+    Downsampled summaries of a :class:`DataCollection <unis.measurements.data.DataCollection>`
+    maintained as readings arrive.  Each :class:`Tier <unis.measurements.rollup.Tier>` keeps
+    the count, sum, minimum, and maximum of the readings per bucket, so aggregates over long
+    ranges are computed from a few buckets rather than every reading::
+
+        rollup = Rollup([(1000000, 3600), (60 * 1000000, 1440), (3600 * 1000000, 720)])
+        starts, means = rollup.query(15 * 60 * 1000000, "mean", t0, t1)
+    """
+    AGGREGATES = ("mean", "sum", "count", "min", "max")
+
+    def __init__(self, tiers):
+        self.tiers = sorted([Tier(i, r) for i, r in tiers], key=lambda t: t.interval)
+        if not self.tiers:
+            raise ValueError("Rollup requires at least one tier")
+        if any(b.interval % a.interval for a, b in zip(self.tiers, self.tiers[1:])):
+            raise ValueError("Rollup tier intervals must be multiples of one another")
+
+    def append(self, ts, value):
+        """
+        :param int ts: Timestamp of the reading in microseconds.
+        :param float value: Value of the reading.
+
+        Record a single reading in every tier.
+        """
+        for tier in self.tiers:
+            tier.add(ts // tier.interval, 1, value, value, value)
+
+    def extend(self, ts, values):
+        """
+        :param ts: Timestamps of the readings in microseconds.
+        :param values: Values of the readings.
+        :type ts: array-like[int]
+        :type values: array-like[float]
+
+        Record many readings in every tier.  Readings are summarized into the finest tier,
+        and each coarser tier is built from the summaries of the tier below it.
+        """
+        ts, values = np.asarray(ts, dtype=np.int64), np.asarray(values, dtype=np.float64)
+        if not len(ts):
+            return
+        order, buckets, starts = _group(ts // self.tiers[0].interval)
+        values = values[order]
+        summary = (np.diff(np.r_[starts, len(values)]), np.add.reduceat(values, starts),
+                   np.minimum.reduceat(values, starts), np.maximum.reduceat(values, starts))
+        interval = self.tiers[0].interval
+        for tier in self.tiers:
+            if tier.interval != interval:
+                _, buckets, summary = self._merge(buckets * interval // tier.interval, *summary)
+                interval = tier.interval
+            tier.extend(buckets, *summary)
+
+    @staticmethod
+    def _merge(keys, counts, totals, lo, hi):
+        order, keys, starts = _group(keys)
+        return order, keys, (np.add.reduceat(counts[order], starts), np.add.reduceat(totals[order], starts),
+                             np.minimum.reduceat(lo[order], starts), np.maximum.reduceat(hi[order], starts))
+
+    def tier(self, interval, t0=None):
+        """
+        :param int interval: Width of the requested buckets in microseconds.
+        :param int t0: (optional) Start of the requested range.
+        :returns: :class:`Tier <unis.measurements.rollup.Tier>` or None
+
+        Return the coarsest tier whose buckets evenly divide **interval**.  When **t0** is
+        given, tiers that no longer retain **t0** are passed over in favor of a tier that does.
+        """
+        fits = [t for t in self.tiers if interval % t.interval == 0]
+        if t0 is not None:
+            fits = [t for t in fits if t.oldest is not None and t.oldest <= t0] or fits
+        return fits[-1] if fits else None
+
+    def query(self, interval, how="mean", t0=None, t1=None):
+        """
+        :param int interval: Width of each bucket in microseconds.
+        :param str how: (optional) Aggregate to compute per bucket, one of ``mean``, ``sum``, ``count``, ``min``, or ``max``.
+        :param int t0: (optional) Start of the range, inclusive.
+        :param int t1: (optional) End of the range, exclusive.
+        :returns: tuple of bucket start timestamps and aggregate values.
+        :raises ValueError: If no tier divides **interval** or the aggregate is unknown.
+
+        Aggregate readings into buckets of **interval** microseconds aligned to multiples of
+        **interval**, answered from the coarsest suitable tier.  Empty buckets are omitted.
+        """
+        if how not in self.AGGREGATES:
+            raise ValueError("Unknown rollup aggregate - {}".format(how))
+        tier = self.tier(interval, t0)
+        if tier is None:
+            raise ValueError("No rollup tier divides interval {}".format(interval))
+        starts, counts, totals, lo, hi = tier.buckets(t0, t1)
+        if not len(starts):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        _, keys, (counts, totals, lo, hi) = self._merge(starts // interval, counts, totals, lo, hi)
+        result = {
+            "mean": lambda: totals / counts,
+            "sum": lambda: totals,
+            "count": lambda: counts.astype(np.float64),
+            "min": lambda: lo,
+            "max": lambda: hi,
+        }
+        return keys * interval, result[how]()
@@ -6,10 +6,13 @@ from unis import settings
 from unis.models.models import _SchemaCache
 schemaLoader = _SchemaCache()
 
-# Ensure cache includes hyper-schema
-schemaLoader.get_class("http://json-schema.org/draft-04/schema#", 'draft4-schema', True)
-schemaLoader.get_class("http://json-schema.org/draft-04/hyper-schema#", 'draft4-hyper-schema', True)
-schemaLoader.get_class("http://json-schema.org/draft-04/links#", 'draft4-links', True)
+# Model classes are built from their schemas on first access
+def __getattr__(name):
+    if name not in settings.SCHEMAS:
+        raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+    cls = schemaLoader.get_class(settings.SCHEMAS[name])
+    setattr(sys.modules[__name__], name, cls)
+    return cls
 
-for name, schema in settings.SCHEMAS.items():
-    setattr(sys.modules[__name__], name, schemaLoader.get_class(schema))
+def __dir__():
+    return sorted(set(globals().keys()) | set(settings.SCHEMAS.keys()))
@@ -1,27 +1,106 @@
-import asyncio, logging, itertools, math, types
+import asyncio, logging, itertools, math, types, weakref
 
-from collections import defaultdict, namedtuple
+from collections import defaultdict, namedtuple, OrderedDict
 from lace.logging import trace
 from threading import RLock
 from urllib.parse import urlparse
 
 from unis.exceptions import UnisReferenceError, CollectionIndexError, UnisAttributeError, ConnectionError
 from unis.models import schemaLoader
-from unis.models.models import DeletedResource, Context as oContext
+from unis.models.models import DeletedResource, UnisObject, _unistype, List, Context as oContext
 from unis.rest import UnisProxy, UnisClient
 from unis.utils import Events, Index, UniqueIndex, asynchronous
 
 MAX_QUERY_COUNT=1600
 
-class _sparselist(list):
+class _slottable(object):
+    """
+    Positional storage for the resources in a collection.  Released slots are
+    recorded on a free list and reused by later appends; once more than half
+    of the table is free it may be compacted, returning a mapping from old to
+    new positions for the owner to remap its indices.
+
+    Readers may :meth:`share` the current slot list and walk it without holding
+    the owner's lock.  While a list is shared, writers copy it before modifying
+    it, so a reader always sees the table as it was when the walk began.
+    """
+    MIN_COMPACT = 64
+    def __init__(self):
+        self._slots, self._free, self._live = [], [], 0
+        self._readers = 0
     def __len__(self):
-        return len(self.valid_list())
+        return self._live
+    def __getitem__(self, i):
+        return self._slots[i]
+    def __iter__(self):
+        for v in self._slots:
+            if v is not None:
+                yield v
+    def __contains__(self, v):
+        return v is not None and v in self._slots
+    def __eq__(self, other):
+        return list(self) == list(other)
+    def __repr__(self):
+        return repr(self.valid_list())
+    def items(self):
+        for i, v in enumerate(self._slots):
+            if v is not None:
+                yield i, v
     def valid_list(self):
-        return list(filter(lambda x: x and not isinstance(x, str), self))
+        return list(self)
     def full_length(self):
-        return super(_sparselist, self).__len__()
+        return len(self._slots)
+    def share(self):
+        self._readers += 1
+        return self._slots
+    def unshare(self, slots):
+        if slots is self._slots:
+            self._readers -= 1
+    def _own(self):
+        if self._readers:
+            self._slots, self._readers = list(self._slots), 0
+    def append(self, v):
+        self._own()
+        self._live += 1
+        if self._free:
+            i = self._free.pop()
+            self._slots[i] = v
+            return i
+        self._slots.append(v)
+        return len(self._slots) - 1
+    def release(self, i):
+        if self._slots[i] is not None:
+            self._own()
+            self._slots[i], self._live = None, self._live - 1
+            self._free.append(i)
+    def fragmented(self):
+        return len(self._free) > max(self.MIN_COMPACT, self._live)
+    def compact(self):
+        mapping, slots = {}, []
+        for i, v in self.items():
+            mapping[i] = len(slots)
+            slots.append(v)
+        self._slots, self._free, self._readers = slots, [], 0
+        return mapping
     
+def _references(res, k):
+    def _ref(v):
+        return v['href'] if isinstance(v, dict) and 'href' in v and '$schema' not in v else v
+    if not isinstance(res, _unistype) or k not in res.__dict__:
+        return []
+    v = res.__dict__[k]
+    if isinstance(v, list) or (isinstance(v, dict) and _ref(v) is v):
+        v = res.__dict__[k] = res._lift(v, res._get_reference(k), None, False)
+    if isinstance(v, List):
+        return [(v, v._rt_ls, i, _ref(x)) for i,x in enumerate(v._rt_ls) if isinstance(x, (dict, _unistype))]
+    return [(res, res.__dict__, k, _ref(v))] if isinstance(v, (dict, _unistype)) else []
+
+def _evictable(res):
+    return res._rt_source and not res._staged and \
+        all(k in res._rt_remote or k.startswith('_rt_') for k in res.__dict__.keys())
+
 _rkey = namedtuple('ResourceKey', ['uid', 'cid'])
+CollectionStats = namedtuple('CollectionStats', ['loaded', 'stubs', 'deleted'])
 @trace("unis.models")
 class UnisCollection(object):
     """
@@ -34,6 +113,8 @@ class UnisCollection(object):
     by property.
     
     .. warning:: Do not construct UnisCollections directly, use get_collection to generate correctly namespaced instance.
+
+    .. note:: Positions within the collection, as used by ``col[i]`` and returned by :meth:`index <unis.models.lists.UnisCollection.index>`, are not stable.  Removing or evicting resources compacts the collection, after which a position may refer to a different resource.  Hold the resource or its ``id`` rather than its position.
     """
     class Context(object):
         def __init__(self, obj, rt):
@@ -44,14 +125,16 @@ class UnisCollection(object):
             return oContext(self._obj.__getitem__(i), self._rt)
         def __setitem__(self, i, v):
             return self._obj.__setitem__(i, v)
-        def where(self, pred):
-            for v in self._obj.where(pred, self._rt):
+        def where(self, pred, include=None):
+            for v in self._obj.where(pred, self._rt, include):
                 yield oContext(v, self._rt)
         def first_where(self, pred):
             v = self._obj.first_where(pred, self._rt)
             return None if isinstance(v, type(None)) else oContext(v, self._rt)
-        def load(self):
-            return [oContext(v, self._rt) for v in self._obj.load()]
+        def load(self, include=None):
+            return [oContext(v, self._rt) for v in self._obj.load(include, self._rt)]
+        def get(self, hrefs, include=None):
+            return self._obj.get(hrefs, include, self._rt)
         def __iter__(self):
             for v in self._obj.__iter__():
                 yield oContext(v, self._rt)
@@ -59,7 +142,7 @@ class UnisCollection(object):
             return self._obj.__repr__()
         def __len__(self):
             return self._obj.__len__()
-    collections = {}
+    collections, namespaces = {}, defaultdict(dict)
     
     @classmethod
     def get_collection(cls, name, model, runtime):
@@ -77,7 +160,11 @@ class UnisCollection(object):
         collection = cls.collections.get(namespace, None) or cls(name, model)
         collection._growth = max(collection._growth, runtime.settings['cache']['growth'])
         collection._subscribe |= runtime.settings['proxy']['subscribe']
+        collection._threads = runtime.settings['proxy']['threads']
+        limit = runtime.settings['cache'].get('max_resident', None)
+        collection._max_resident = limit.get(name, None) if isinstance(limit, dict) else limit
         cls.collections[namespace] = collection
+        cls.namespaces[runtime.settings['namespace']][name] = collection
         return UnisCollection.Context(collection, runtime)
     @classmethod
     def from_name(cls, name, runtime):
@@ -94,39 +181,53 @@ class UnisCollection(object):
                 raise KeyError(f"Invalid collection name '{name}'")
             return UnisCollection.Context(cls.collections[namespace], runtime)
         else:
-            results = []
-            for ns,col in cls.collections.items():
-                if ns.startswith(runtime.settings['namespace']):
-                    results.append(UnisCollection.Context(col, runtime))
-            return results
+            cols = cls.namespaces.get(runtime.settings['namespace'], {})
+            return [UnisCollection.Context(col, runtime) for col in cols.values()]
     def __init__(self, name, model):
         self._lock = RLock()
         self._complete_cache, self._get_next = self._proto_complete_cache, self._proto_get_next
         self.name, self.model = name, model
         self._indices, self._services, self._unis = {}, [], UnisProxy(name)
         self._block_size = 10
-        self._growth, self._subscribe = 0, False
-        self._stubs, self._cache = {}, _sparselist()
+        self._growth, self._subscribe, self._threads = 0, False, 10
+        self._stubs, self._cache = {}, _slottable()
         self.createIndex("id", unique=True)
         self.createIndex("selfRef", unique=True)
         self._loop = asyncio.get_event_loop()
         self._callbacks = []
         self._cids = set()
+        self._lru, self._max_resident = OrderedDict(), None
+        self._evicted, self._scans = {}, 0
+        self._nstubs, self._deleted = 0, 0
         
     def __getitem__(self, i):
+        """
+        :param int i: Position of the resource, as returned by :meth:`index <unis.models.lists.UnisCollection.index>`.
+        :return: :class:`UnisObject <unis.models.models.UnisObject>` or None
+
+        .. warning:: Positions are not stable.  Removing or evicting resources may compact the collection, after which a position may refer to a different resource.  Hold the resource or its ``id`` rather than its position.
+        """
         if i >= self._cache.full_length():
             self._complete_cache()
-        return self._cache[i]
+        v = self._cache[i]
+        if v and self._max_resident:
+            self._touch([v._getattribute('id', None)])
+        return v
     
     def __setitem__(self, i, item):
         self._check_record(item)
-        if not self._cache[i].merge(item, None):
-            return None
         with self._lock:
-            for k, index in self._indices.items():
-                if self._cache[i]._getattribute(k, None, None) is not None:
-                    index.update(i, self._cache[i]._getattribute(k, None))
-        return self._cache[i]
+            res = self._cache[i]
+        return res if self._merge(res, item) else None
+    def _merge(self, res, item):
+        if not res.merge(item, None):
+            return False
+        with self._lock:
+            try:
+                self._reindex(self._indices['id'].index(res._getattribute('id', None)), res)
+            except CollectionIndexError:
+                pass
+        return True
 
     def pre_flush(self, items):
         """
@@ -158,26 +259,36 @@ class UnisCollection(object):
         :class:`RuntimeServices <unis.services.abstract.RuntimeService>` when updates to the resource
         occur.
         """
+        self._revive([item.id])
         self._serve(Events.internalupdate if internal else Events.update, item)
-    def load(self):
+    def load(self, include=None, ctx=None):
         """
+        :param list[str] include: (optional) Reference paths to resolve eagerly, see :meth:`include <unis.models.lists.UnisCollection.include>`.
+        :param ctx: This parameter must be left empty when called by external sources.
         :return: List of :class:`UnisObjects <unis.models.models.UnisObject>`.
         
         Force the collection to pull and cache all remote resources matching the collection.
         """
-        self._complete_cache()
-        return self._cache.valid_list()
+        self._begin_scan()
+        result = self._cache.valid_list()
+        self._end_scan()
+        return self.include(result, include, ctx)
     
-    def get(self, hrefs):
+    def get(self, hrefs, include=None, ctx=None):
         """
         :param list[str] hrefs: List of urls to resources to query.
+        :param list[str] include: (optional) Reference paths to resolve eagerly, see :meth:`include <unis.models.lists.UnisCollection.include>`.
+        :param ctx: This parameter must be left empty when called by external sources.
         :return: List of :class:`UnisObjects <unis.models.models.UnisObject>`
         
         Search for one or more resources and include them in the collection.  If the resources
         are local, they are immediately returned.
         """
+        if include:
+            return self.include(self.get(hrefs), include, ctx)
+        ids = [urlparse(r).path.split('/')[-1] for r in hrefs]
+        self._revive(ids)
         with self._lock:
-            ids = [urlparse(r).path.split('/')[-1] for r in hrefs]
             try:
                 to_get = [_rkey(uid, self._stubs[uid]) for uid in ids if isinstance(self._stubs[uid], str) or not self._subscribe]
             except KeyError as e:
@@ -185,7 +296,10 @@ class UnisCollection(object):
         if to_get:
             self._get_next(to_get)
         with self._lock:
-            return [self._stubs[uid] for uid in ids]
+            result = [self._stubs[uid] for uid in ids]
+            self._touch(ids)
+        self._trim()
+        return result
     
     def append(self, item):
         """
@@ -203,28 +317,66 @@ class UnisCollection(object):
 
     def _validate_append(self, item):
         self._check_record(item)
-        try:
-            i = self.index(item)
-        except CollectionIndexError:
-            item.setCollection(self)
-            with self._lock:
-                self._stubs[item._getattribute('id', None)] = item
-            i = self._cache.full_length()
-            self._cache.append(item)
-            with self._lock:
+        uid = item._getattribute('id', None)
+        with self._lock:
+            try:
+                res = self._cache[self._indices['id'].index(uid)]
+            except CollectionIndexError:
+                item.setCollection(self)
+                self._set_stub(uid, item)
+                i = self._cache.append(item)
                 for k, index in self._indices.items():
                     if item._getattribute(k, None, None) is not None:
                         index.update(i, item._getattribute(k, None))
+                self._touch([uid])
+                res = None
+        if res is None:
             self._serve(Events.new, item)
+            self._trim()
             return (True, item)
 
-        uid = item._getattribute('id', None)
-        if not self.__setitem__(i, item):
-            return (False, self._cache[i])
+        if not self._merge(res, item):
+            return (False, res)
         with self._lock:
             if uid not in self._stubs or isinstance(self._stubs[uid], str):
-                self._stubs[uid] = self._cache[i]
-            return (True, self._cache[i])
+                self._set_stub(uid, res)
+            self._touch([uid])
+            return (True, res)
+
+    def append_many(self, items):
+        """
+        :param items: Resources to be added to the collection
+        :type items: list[:class:`UnisObject <unis.models.models.UnisObject>`]
+        :return: list of :class:`UnisObjects <unis.models.models.UnisObject>`
+        
+        As :meth:`append <unis.models.lists.UnisCollection.append>` for many resources.  New
+        resources are stored and indexed together under a single lock and their ``new`` events
+        are delivered to callbacks and services as a single burst once all are stored.
+        """
+        new, result = {}, []
+        with self._lock:
+            for item in items:
+                self._check_record(item)
+                uid = item._getattribute('id', None)
+                if uid in new:
+                    new[uid][1].merge(item, None)
+                    result.append(new[uid][1])
+                    continue
+                try:
+                    self._indices['id'].index(uid)
+                except CollectionIndexError:
+                    item.setCollection(self)
+                    self._set_stub(uid, item)
+                    new[uid] = (self._cache.append(item), item)
+                    result.append(item)
+                else:
+                    result.append(self._validate_append(item)[1])
+            for k, index in self._indices.items():
+                index.update_many([(i, v._getattribute(k, None)) for i,v in new.values() if v._getattribute(k, None, None) is not None])
+            self._touch(new.keys())
+        self._serve_many(Events.new, [v for _,v in new.values()])
+        self._trim()
+        return result
 
     def remove(self, item):
         """
@@ -241,14 +393,37 @@ class UnisCollection(object):
             self._unis.delete(item.getSource(), item.id)
         except (UnisReferenceError, ConnectionError):
             self._remove_record(item)
+
+    def remove_many(self, items):
+        """
+        :param items: Resources to be removed from the collection
+        :type items: list[:class:`UnisObject <unis.models.models.UnisObject>`]
+        
+        As :meth:`remove <unis.models.lists.UnisCollection.remove>` for many resources.  Back end
+        deletes are grouped by data store and issued concurrently, bounded by the ``proxy.threads``
+        setting.  Resources that are local only, that the data store rejects, or that will not be
+        reported back through a subscription are removed from the collection in a single pass.
+        """
+        items, remote, local = list(items), [], []
+        for item in items:
+            self._check_record(item)
+            try:
+                remote.append(((item.getSource(), item.id), item))
+            except UnisReferenceError:
+                local.append(item)
+        results = self._unis.delete_many([t for t,_ in remote], self._threads)
+        local.extend([item for (_,item),ok in zip(remote, results) if not ok or not self._subscribe])
+        self._remove_records(local)
     
     def index(self, item):
         """
         :param item: Resource to be removed from the collection
         :type item: :class:`UnisObject <unis.models.models.UnisObject>`
-        :return: integer index ofr the resource in the collection
+        :return: integer index of the resource in the collection
         
         Gets the index of the object within the collection.
+
+        .. warning:: The index is only valid until resources are next removed from or evicted by the collection.
         """
         item = item if isinstance(item, oContext) else oContext(item, None)
         with self._lock:
@@ -270,10 +445,11 @@ class UnisCollection(object):
         except StopIteration:
             return None
     
-    def where(self, pred, ctx=None):
+    def where(self, pred, ctx=None, include=None):
         """
         :param pred: Predicate used to filter resources.
         :param ctx: This parameter must be left empty when called by external sources.
+        :param list[str] include: (optional) Reference paths to resolve eagerly, see :meth:`include <unis.models.lists.UnisCollection.include>`.
         :type pred: callable or dictionary
         :return: Generator of :class:`UnisObject <unis.models.models.UnisObject>`
         
@@ -286,7 +462,21 @@ class UnisCollection(object):
         
             pred = {"value": {"gt": 500}, "type": "test_nodes"}
             valid_nodes = nodes.where(pred)
-        """
+        
+        Function predicates are evaluated over a snapshot of the collection taken when iteration
+        begins.  The collection is not locked while the predicate runs, so resources added or
+        removed during a scan are neither blocked nor seen by it.
+        """
+        if include:
+            return iter(self.include(list(self._where(pred, ctx)), include, ctx))
+        return self._where(pred, ctx)
+    def _where(self, pred, ctx):
+        self._begin_scan()
+        try:
+            yield from self._scan_where(pred, ctx)
+        finally:
+            self._end_scan()
+    def _scan_where(self, pred, ctx):
         op = {
             "gt": lambda b: lambda a: a > b, 
             "ge": lambda b: lambda a: a >= b,
@@ -294,14 +484,12 @@ class UnisCollection(object):
             "le": lambda b: lambda a: a <= b,
             "eq": lambda b: lambda a: a == b
         }
-        self._complete_cache()
         if isinstance(pred, types.FunctionType):
-            with self._lock:
-                for v in self._cache:
-                    try:
-                        if v and pred(oContext(v, ctx)): yield v
-                    except UnisAttributeError:
-                        pass
+            for v in self._snapshot():
+                try:
+                    if pred(oContext(v, ctx)): yield v
+                except UnisAttributeError:
+                    pass
         else:
             non_index = {}
             with self._lock:
@@ -317,14 +505,54 @@ class UnisCollection(object):
                     else:
                         for f,v in v.items():
                             non_index[k] = op[f](v)
-            for i in subset:
-                record = self._cache[i]
+            with self._lock:
+                records = [self._cache[i] for i in subset]
+            for record in records:
                 try:
                     if record and all([f(record._getattribute(k, ctx, None)) for k,f in non_index.items()]):
                         yield record
                 except (TypeError,UnisAttributeError):
                     pass
     
+    def include(self, resources, include, ctx):
+        """
+        :param resources: Resources from which to resolve references.
+        :param list[str] include: Dotted reference paths to resolve.
+        :param ctx: Context of the current operation.
+        :type resources: list[:class:`UnisObject <unis.models.models.UnisObject>`]
+        :return: ``resources``
+        
+        Eagerly resolve the references named by ``include`` for each resource.  Each path is a
+        dotted list of attribute names, for instance ``["ports", "ports.link"]`` resolves the ports of
+        each resource and the link of each of those ports.  Paths are resolved breadth first; every
+        reference at a given depth is located with a single call to
+        :meth:`ObjectLayer.find_many <unis.runtime.oal.ObjectLayer.find_many>`, so the number of
+        requests depends on the depth of the paths and not the number of resources.
+        """
+        tree = {}
+        for path in include or []:
+            node = tree
+            for k in path.split('.'):
+                node = node.setdefault(k, {})
+        level = [(r, tree) for r in resources] if tree and ctx else []
+        while level:
+            pending, hrefs, nxt = [], [], []
+            for res, spec in level:
+                for k, sub in spec.items():
+                    for owner, container, key, v in _references(res, k):
+                        if isinstance(v, str):
+                            pending.append((owner, container, key, sub))
+                            hrefs.append(v)
+                        elif sub:
+                            nxt.append((v, sub))
+            for (owner, container, key, sub), v in zip(pending, ctx.find_many(hrefs) if hrefs else []):
+                if v is None: continue
+                container[key] = v
+                owner._invalidate(owner._get_reference(key))
+                if sub: nxt.append((v, sub))
+            level = nxt
+        return resources
+
     def createIndex(self, k, unique=False):
         """
         :param str k: Key for the new index
@@ -334,7 +562,7 @@ class UnisCollection(object):
         with self._lock:
             if k not in self._indices:
                 self._indices[k] = UniqueIndex(k) if unique else Index(k)
-                for i, v in enumerate(self._cache):
+                for i, v in self._cache.items():
                     if v._getattribute(k, None, None) is not None:
                         self._indices[k].update(i, v._getattribute(k, None))
                     
@@ -343,15 +571,14 @@ class UnisCollection(object):
         :param res: Resource to update index values.
         :type res: :class:`UnisObject <unis.models.models.UnisObject>`
         
-        Update the index values for a modified or new resource.
+        Update the index values for a modified or new resource.  Only indices
+        whose key has changed since the last update are modified.  Evicted resources
+        that are still referenced are returned to the collection first.
         """
+        res = res.getObject() if isinstance(res, oContext) else res
+        self._revive([res.id])
         with self._lock:
-            i = self.index(res)
-            for k, index in self._indices.items():
-                v = getattr(res, k, None)
-                if v is None:
-                    index.remove(i)
-                index.update(i, v)
+            self._reindex(self.index(res), res)
             
     async def addSources(self, cids):
         """
@@ -371,7 +598,7 @@ class UnisCollection(object):
         for v in filter(lambda x: 'selfRef' in x, await self._unis.getStubs(cids)):
             uid = urlparse(v['selfRef']).path.split('/')[-1]
             if uid not in self._stubs:
-                try: self._stubs[uid] = UnisClient.resolve(v['selfRef'])
+                try: self._set_stub(uid, UnisClient.resolve(v['selfRef']))
                 except UnisReferenceError:
                     pass
         self._cids.update(cids)
@@ -405,23 +632,135 @@ class UnisCollection(object):
         with self._lock:
             self._callbacks.append(cb)
     def _remove_record(self, v):
-        v = v if isinstance(v, oContext) else oContext(v, None)
+        self._remove_records([v])
+    def _remove_records(self, items):
+        items = [v if isinstance(v, oContext) else oContext(v, None) for v in items]
+        items = list({v._getattribute('id'): v for v in items}.values())
+        if not items:
+            return
+        with self._lock:
+            for v in items:
+                uid = v._getattribute('id')
+                try:
+                    self._release_slot(self._indices['id'].index(uid))
+                except CollectionIndexError:
+                    pass
+                if self._del_stub(uid) is not None:
+                    self._deleted += 1
+                self._lru.pop(uid, None)
+            self._compact()
+
+        [v._delete() for v in items]
+        self._serve_many(Events.delete, items)
+        for v in items:
+            v.setObject(DeletedResource())
+            v.setRuntime(None)
+
+    def _snapshot(self):
+        with self._lock:
+            slots = self._cache.share()
+        try:
+            for v in slots:
+                if v is not None:
+                    yield v
+        finally:
+            with self._lock:
+                self._cache.unshare(slots)
+    def _reindex(self, i, res):
+        for k, index in self._indices.items():
+            v = res._getattribute(k, None, None)
+            if v is not None:
+                index.update(i, v)
+                continue
+            try: index.remove(i)
+            except CollectionIndexError: pass
+    def _set_stub(self, uid, v):
+        if not isinstance(v, str):
+            self._evicted.pop(uid, None)
+        old = self._stubs.get(uid, None)
+        self._nstubs += isinstance(v, str) - isinstance(old, str)
+        self._stubs[uid] = v
+    def _del_stub(self, uid):
+        self._evicted.pop(uid, None)
+        old = self._stubs.pop(uid, None)
+        self._nstubs -= isinstance(old, str)
+        return old
+    def _drop_slot(self, i):
+        self._release_slot(i)
+        self._compact()
+    def _release_slot(self, i):
+        for index in self._indices.values():
+            try: index.remove(i)
+            except CollectionIndexError: pass
+        self._cache.release(i)
+    def _compact(self):
+        if self._cache.fragmented():
+            mapping = self._cache.compact()
+            for index in self._indices.values():
+                index.remap(mapping)
+    def _touch(self, uids):
+        if self._max_resident:
+            for uid in uids:
+                self._lru[uid] = None
+                self._lru.move_to_end(uid)
+    def _begin_scan(self):
+        with self._lock:
+            self._scans += 1
         try:
-            i = self.index(v)
+            self._complete_cache()
+            self._revive(list(self._evicted.keys()))
+        except BaseException:
             with self._lock:
-                [index.remove(i) for index in self._indices.values()]
-                self._cache[i] = None
+                self._scans -= 1
+            raise
+    def _end_scan(self):
+        with self._lock:
+            self._scans -= 1
+        self._trim()
+    def _revive(self, uids):
+        if not self._evicted:
+            return
+        with self._lock:
+            for uid in uids:
+                ref = self._evicted.pop(uid, None)
+                res = ref() if ref else None
+                if res is None or not isinstance(self._stubs.get(uid, None), str):
+                    continue
+                self._set_stub(uid, res)
+                i = self._cache.append(res)
+                self._reindex(i, res)
+                self._touch([uid])
+    def _trim(self):
+        if not self._max_resident or self._scans:
+            return
+        with self._lock:
+            over = len(self._lru) - self._max_resident
+            if over <= 0:
+                return
+            victims, pinned = [], []
+            for uid in self._lru:
+                res = self._stubs.get(uid, None)
+                if res is None or isinstance(res, str) or not _evictable(res):
+                    pinned.append(uid)
+                    continue
+                victims.append((uid, res))
+                if len(victims) >= over:
+                    break
+            for uid in pinned:
+                if isinstance(self._stubs.get(uid, None), (str, type(None))):
+                    del self._lru[uid]
+                else:
+                    self._lru.move_to_end(uid)
+            for uid, res in victims:
+                self._evict(uid, res)
+    def _evict(self, uid, res):
+        try:
+            self._drop_slot(self._indices['id'].index(uid))
         except CollectionIndexError:
             pass
-
-        with self._lock:
-            try: del self._stubs[v._getattribute('id')]
-            except KeyError: pass
-            
-        v._delete()
-        self._serve(Events.delete, v)
-        v.setObject(DeletedResource())
-        v.setRuntime(None)
+        self._set_stub(uid, res.getSource())
+        self._evicted[uid] = weakref.ref(res)
+        del self._lru[uid]
 
     def _check_record(self, v):
         if self.model._rt_schema["name"] not in v.names:
@@ -436,6 +775,14 @@ class UnisCollection(object):
             for service in self._services:
                 tocall.append(getattr(service, ty.name))
         [f(ctx) for f in tocall]
+    def _serve_many(self, ty, items):
+        ctxs = [oContext(v, None) for v in items]
+        [v._callback(ty.name) for v in items]
+        with self._lock:
+            for ctx in ctxs:
+                [cb(ctx, ty.name) for cb in self._callbacks]
+            tocall = [getattr(service, ty.name) for service in self._services]
+        [f(ctx) for f in tocall for ctx in ctxs]
     
     def _proto_complete_cache(self):
         if not self._subscribe:
@@ -446,16 +793,17 @@ class UnisCollection(object):
     
     def _proto_get_next(self, ids=None):
         ids = ids or []
+        size = max(self._block_size, len(ids))
         with self._lock:
             ids += [_rkey(k,v) for k,v in self._stubs.items() if isinstance(v,str) or not self._subscribe]
-        if self._subscribe and self._block_size >= len(ids):
+        if self._subscribe and size >= len(ids):
             self._complete_cache, self._get_next = lambda: None, lambda x=None: None
-        requests = defaultdict(list)
-        for v in ids[:self._block_size]:
+        requests = defaultdict(set)
+        for v in ids[:size]:
             src = v.cid if isinstance(v.cid, str) else v.cid.getSource()
-            requests[src].append(v.uid)
+            requests[src].add(v.uid)
 
-        futs = [self._get_block(k,v,self._block_size) for k,v in requests.items()]
+        futs = [self._get_block(k,list(v),min(size, MAX_QUERY_COUNT)) for k,v in requests.items()]
         results = asynchronous.make_async(asyncio.gather, *futs)
 
         self._block_size *= self._growth
@@ -518,15 +866,27 @@ class UnisCollection(object):
             rep = ".{} {}".format(self.name, self._cache.__repr__() if self._cache and len(self._cache) < 4 else "[...]")
             return "<UnisList{}>".format(rep if hasattr(self, "name") else "")
     
+    @property
+    def stats(self):
+        """
+        :return: :class:`CollectionStats <unis.models.lists.CollectionStats>`
+        
+        Counts of the resources known to the collection: ``loaded`` resources resident in memory,
+        ``stubs`` known remotely but not yet fetched, and ``deleted`` resources removed since the
+        collection was created.
+        """
+        return CollectionStats(len(self._cache), self._nstubs, self._deleted)
+    
     def __len__(self):
-        with self._lock:
-            return len(self._cache) + len([x for x,v in self._stubs.items() if isinstance(v, str)])
+        return len(self._cache) + self._nstubs
     
     def __contains__(self, item):
         with self._lock:
             return item in self._cache
     
     def __iter__(self):
-        with self._lock:
-            self._complete_cache()
-            return iter(self._cache.valid_list())
+        self._begin_scan()
+        try:
+            yield from self._snapshot()
+        finally:
+            self._end_scan()
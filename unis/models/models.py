@@ -1,12 +1,13 @@
-import os, types
+import io, os, types
 import json, jsonschema, requests
 
+from collections import defaultdict
 from lace.logging import trace
 
 from unis.exceptions import UnisReferenceError, UnisAttributeError, LockedError
 from unis.rest import UnisClient
-from unis.settings import SCHEMA_CACHE_DIR
-from unis.utils import asynchronous, Events
+from unis.settings import SCHEMA_CACHE_DIR, SCHEMA_PACK_DIR
+from unis.utils import asynchronous, codec, Events
 
 class SkipResource(Exception):
     """
@@ -25,6 +26,7 @@ class _attr(object):
 
 
 class DeletedResource(object):
+    _rt_fields = frozenset()
     def __getattr__(self, n):
         raise LockedError("This object has been deleted and is locked")
     
@@ -45,15 +47,27 @@ class Context(object):
         self.setObject(obj)
         self.setRuntime(runtime)
     def __getattribute__(self, n):
-        if n not in ['_obj', '_rt'] and not hasattr(type(self), n):
-            v = self._obj._getattribute(n, self._rt)
-            if callable(v):
-                def f(*args, **kwargs):
-                    kwargs['ctx'] = self._rt
-                    return v(*args, **kwargs)
-                return f
-            return Context(v, self._rt) if isinstance(v, _unistype) else v
-        return super(Context, self).__getattribute__(n)
+        if n in _CONTEXT_ATTRS:
+            return object.__getattribute__(self, n)
+        obj, rt = object.__getattribute__(self, '_obj'), object.__getattribute__(self, '_rt')
+        if n in type(obj)._rt_fields:
+            v = object.__getattribute__(obj, '__dict__').get(n, _nodefault)
+            if isinstance(v, (List, Local, UnisObject)):
+                return Context(v, rt)
+            if isinstance(v, _SCALARS):
+                return v
+        methods = object.__getattribute__(self, '__dict__').get('_rt_methods', None)
+        if methods and n in methods:
+            return methods[n]
+        v = obj._getattribute(n, rt)
+        if callable(v):
+            def f(*args, **kwargs):
+                kwargs['ctx'] = object.__getattribute__(self, '_rt')
+                return v(*args, **kwargs)
+            if isinstance(v, types.MethodType) and v.__self__ is obj:
+                object.__getattribute__(self, '__dict__').setdefault('_rt_methods', {})[n] = f
+            return f
+        return Context(v, rt) if isinstance(v, _unistype) else v
     def __setattr__(self, n, v):
         if n in ['_obj', '_rt']:
             return super(Context, self).__setattr__(n, v)
@@ -116,22 +130,29 @@ class Context(object):
     
         set the resource associated with the :class:`Context <unis.models.models.Context>`.
         """
+        self.__dict__.pop('_rt_methods', None)
         self._obj = res.getObject() if isinstance(res, Context) else res
+_CONTEXT_ATTRS = frozenset(dir(Context)) | {'_obj', '_rt'}
 
 class _nodefault(object): pass
+class _localdict(dict): pass
+_SCALARS = (str, int, float, bool, type(None))
+_KNOWN_ATTRS = defaultdict(set)
 @trace("unis.models")
 class _unistype(object):
     _rt_parent = _attr()
     _rt_source, _rt_raw, _rt_reference, _staged = _attr(), _attr(), _attr(), _attr()
-    _rt_restricted = []
+    _rt_restricted, _rt_fields, _rt_names = [], frozenset(), frozenset()
     def __init__(self, v, ref):
         self._rt_reference, self._rt_raw, self._staged = ref, self, False
     
     def __getattribute__(self, n):
-        if not hasattr(type(self), n) and n not in self._rt_restricted:
-            raise NotImplementedError(f"'{n}'") # This is for debugging purposes, this line should never be reached
-        v = super(_unistype, self).__getattribute__(n)
-        return v._rt_raw if isinstance(v, Primitive) else v
+        known = _KNOWN_ATTRS[type(self)]
+        if n not in known:
+            if not hasattr(type(self), n) and n not in type(self)._rt_restricted:
+                raise NotImplementedError(f"'{n}'") # This is for debugging purposes, this line should never be reached
+            known.add(n)
+        return super(_unistype, self).__getattribute__(n)
     def _getattribute(self, n, ctx, default=_nodefault()):
         try:
             v = super(_unistype, self).__getattribute__(n)
@@ -140,10 +161,12 @@ class _unistype(object):
                 raise UnisAttributeError(e) from e
             v = default
         if n != '__dict__' and n in self.__dict__:
-            try: self.__dict__[n] = self._lift(v, self._get_reference(n), ctx)
+            if isinstance(v, _SCALARS):
+                return v
+            try: v = self.__dict__[n] = self._lift(v, self._get_reference(n), ctx)
             except SkipResource:
                 raise UnisAttributeError("'{}' object has no attribute {} or attribute is invalid".format(self.__class__.__name__, n))
-            return self.__dict__[n]._rt_raw
+            return v._rt_raw if isinstance(v, _unistype) else v
         return v
     
     def __setattr__(self, n, v):
@@ -167,10 +190,6 @@ class _unistype(object):
                 self._update(self._get_reference(n), ctx)
     
     def _lift(self, v, ref, ctx, remote=True):
-        class _localdict(dict):
-            @property
-            def _rt_raw(self): return self
-
         v = v.getObject() if isinstance(v, Context) else v
         if isinstance(v, _unistype):
             return v
@@ -178,9 +197,11 @@ class _unistype(object):
             if '$schema' in v or 'href' in v:
                 if remote and ctx:
                     try:
-                        return ctx.insert(v) if "$schema" in v else ctx.find(v['href'])[0]
+                        v = ctx.insert(v) if "$schema" in v else ctx.find(v['href'])[0]
                     except UnisReferenceError:
                         raise SkipResource()
+                    self._invalidate(ref)
+                    return v
                 else:
                     return _localdict(v)
             else:
@@ -188,15 +209,27 @@ class _unistype(object):
         elif isinstance(v, list):
             v = List(v, ref)
         else:
-            v = Primitive(v, ref)
+            return v
         v._rt_parent = self._rt_parent
         return v
     
     def _update(self, ref, ctx):
         if self._rt_parent:
             self._rt_parent._update(ref, ctx)
+    def _invalidate(self, ref, ctx=None):
+        if self._rt_parent:
+            self._rt_parent._invalidate(ref)
     def _get_reference(self, n):
         raise NotImplemented()
+    def _release(self):
+        children = self._rt_ls if isinstance(self, List) else list(self.__dict__.values())
+        for v in children:
+            if isinstance(v, (List, Local)) and v._rt_parent is self._rt_parent:
+                v._release()
+        for c in type(self).__mro__:
+            for a in c.__dict__.values():
+                if isinstance(a, _attr):
+                    a.__values__.pop(self, None)
     def _iter(self):
         raise AttributeError("{} is not iterable".format(type(self)))
     def to_JSON(self, ctx, top):
@@ -206,41 +239,6 @@ class _unistype(object):
     def __repr__(self):
         return super().__repr__()
     
-@trace("unis.models")
-class Primitive(_unistype):
-    """
-    :param list v: The value of the object.
-    :param ref: The owner of the object.
-    :type ref: :class:`UnisObject <unis.models.models.UnisObject>`
-    
-    A runtime type representation of a python ``number``, ``string``, and ``boolean``.
-    """
-    def __init__(self, v, ref):
-        super(Primitive, self).__init__(v, ref)
-        self._rt_raw = v
-    def _get_reference(self, n):
-        return self._rt_reference
-    def to_JSON(self, ctx, top):
-        """
-        :param ctx: Context of the current operation.
-        :param bool top: Indicates if this is the first ``to_JSON`` call in the chain.
-        :returns: string or number value of the :class:`UnisObject <unis.models.models.Primitive>`
-        
-        Returns the raw value stored in the object.
-        """
-        return self._rt_raw
-    def merge(self, other, ctx):
-        """
-        :param other: Instance to merge with the :class:`Primitive <unis.models.models.Primitive>`.
-        :type other: :class:`Primitive <unis.models.models.Primitive>`
-        
-        Merges two :class:`Primitives <unis.models.models.Primitive>`, the passed in instance overwrites
-        the calling instance where conflicts occur.
-        """
-        self._rt_raw = other._rt_raw if isinstance(other, _unistype) else other
-    def __repr__(self):
-        return "<unis.Primitive>"
-
 @trace("unis.models")
 class List(_unistype):
     """
@@ -250,21 +248,33 @@ class List(_unistype):
     
     A runtime type representation of a python ``list``.
     """
-    _rt_ls = _attr()
+    _rt_ls, _rt_resolved = _attr(), _attr(False)
     def __init__(self, v, ref):
         super(List, self).__init__(v, ref)
         v = v if isinstance(v, list) else [v]
         self._rt_ls = [x.getObject() if isinstance(x, Context) else x for x in v]
+    def _resolve(self, ctx):
+        if self._rt_resolved or not ctx:
+            return
+        self._rt_resolved = True
+        refs = [(i, x['href']) for i,x in enumerate(self._rt_ls) if isinstance(x, dict) and 'href' in x and '$schema' not in x]
+        if len(refs) > 1:
+            found = [(i, v) for (i,_), v in zip(refs, ctx.find_many([h for _,h in refs])) if v is not None]
+            for i, v in found:
+                self._rt_ls[i] = v
+            if found:
+                self._invalidate(self._rt_reference)
     def _getitem(self, i, ctx):
+        self._resolve(ctx)
         try:
-            self._rt_ls[i] = self._lift(self._rt_ls[i], self._rt_reference, ctx)
-            return self._rt_ls[i]._rt_raw
+            v = self._rt_ls[i] = self._lift(self._rt_ls[i], self._rt_reference, ctx)
+            return v._rt_raw if isinstance(v, _unistype) else v
         except SkipResource:
             return self._getitem(i+1, ctx)
     def _setitem(self, i, v, ctx):
         if isinstance(v, Context):
             v = v.getObject()
-        self._rt_ls[i] = v
+        self._rt_ls[i], self._rt_resolved = v, False
         self._update(self._rt_reference, ctx)
     def append(self, v, ctx):
         """
@@ -276,6 +286,7 @@ class List(_unistype):
         if isinstance(v, Context):
             v = v.getObject()
         self._rt_ls.append(v)
+        self._rt_resolved = False
         self._update(self._rt_reference, ctx)
     def remove(self, v, ctx):
         """
@@ -357,13 +368,14 @@ class List(_unistype):
         Merges two :class:`Lists <unis.models.models.List>`, the passed in instance overwrites
         the calling instance where conflicts occur.
         """
-        self._rt_ls = other._rt_ls
+        self._rt_ls, self._rt_resolved = other._rt_ls, False
     
     def _iter(self, ctx):
+        self._resolve(ctx)
         for i, x in enumerate(self._rt_ls):
             try:
                 v = self._rt_ls[i] = self._lift(x, self._rt_reference, ctx)
-                yield v._rt_raw
+                yield v._rt_raw if isinstance(v, _unistype) else v
             except SkipResource: pass
     def __len__(self):
         return len(self._rt_ls)
@@ -452,13 +464,14 @@ class UnisObject(_unistype, metaclass=_metacontextcheck):
     All attributes listed in ``v`` are considered to be *remote* attributes and are included in
     the data store on update.
     """
-    _rt_remote, _rt_collection = _attr(), _attr()
+    _rt_remote, _rt_collection, _rt_fragments = _attr(frozenset()), _attr(), _attr()
     _rt_restricted, _rt_live = ["id", "ts", "selfRef"], False
     _rt_callback = lambda s,x,e: x
     def __init__(self, v=None, ref=None):
         v = {k: (v.getObject() if isinstance(v, Context) else v) for k,v in (v or {}).items()}
         super(UnisObject, self).__init__(v, ref)
         self._rt_parent, self._rt_remote, self._rt_live = self, set(v.keys()) | set(self._rt_defaults.keys()), True
+        self._rt_fragments = {}
         self.__dict__.update({**self._rt_defaults, **v})
         if self.__dict__.get('selfRef'):
             self._rt_source = UnisClient.resolve(self._getattribute('selfRef', None))
@@ -466,15 +479,32 @@ class UnisObject(_unistype, metaclass=_metacontextcheck):
     def _setattr(self, n, v, ctx):
         super(UnisObject, self)._setattr(n, v, ctx)
     def _update(self, ref, ctx):
+        self._invalidate(ref)
         if ref in self._rt_remote and self._rt_collection and ctx and self._rt_live:
             self._rt_collection.update(self, internal=True)
             ctx._update(Context(self, ctx))
+    def _invalidate(self, ref, ctx=None):
+        if self._rt_fragments:
+            self._rt_fragments.pop(ref, None)
     def _get_reference(self, n):
         return n
+    def _fragment(self, k, v, ctx):
+        cached = self._rt_fragments.get(k, None) if self._rt_fragments is not None else None
+        if cached and cached[0] is v:
+            return cached[1]
+        if isinstance(v, (list, dict)):
+            self.__dict__[k] = v = self._lift(v, self._get_reference(k), ctx, False)
+        result = v.to_JSON(ctx, not self._rt_source) if isinstance(v, _unistype) else v
+        fragment = b"".join([_encode(k), b":", _encode(result)])
+        if _static(v, self) and self._rt_fragments is not None:
+            self._rt_fragments[k] = (v, fragment)
+        return fragment
 
     def _delete(self, ctx):
         self.__dict__['selfRef'] = ''
         self._rt_source = None
+        if self._rt_fragments:
+            self._rt_fragments.clear()
     def touch(self, ctx):
         """
         :param ctx: Context of the current operation.
@@ -660,17 +690,23 @@ class UnisObject(_unistype, metaclass=_metacontextcheck):
                         v = self._lift(v, self._get_reference(k), ctx, False)
                     except SkipResource:
                         continue
-                if isinstance(self.__dict__[k], _unistype):
+                cur = self.__dict__[k]
+                if isinstance(cur, _unistype):
                     if isinstance(v, dict):
-                        self.__dict__[k] = v if v.get('selfRef', '') != self.selfRef else self.__dict__[k]
+                        self.__dict__[k] = v if v.get('selfRef', '') != self.selfRef else cur
+                    elif isinstance(cur, (List, Local)) and isinstance(v, type(cur)):
+                        # Merge containers in place so existing handles to the attribute remain live
+                        cur.merge(v, ctx)
                     else:
-                        self.__dict__[k].merge(v, ctx)
+                        self.__dict__[k] = v
                 else:
                     self.__dict__[k] = v
             else:
                 self.__dict__[k] = v
         for n in other._rt_remote:
             self._rt_remote.add(n)
+        if self._rt_fragments:
+            self._rt_fragments.clear()
         return True
     
     def clone(self, ctx):
@@ -682,7 +718,7 @@ class UnisObject(_unistype, metaclass=_metacontextcheck):
         
         .. warning:: Any references made in the object will retain their old value.  This function is insufficient to make a complete clone of a heirarchy of resources.
         """
-        d = self.to_JSON(ctx)
+        d = codec.loads(Serializer().encode(self, ctx))
         d.update(**{'selfRef': '', 'id': ''})
         model = type(self)
         return Context(model(d), None)
@@ -698,18 +734,143 @@ class UnisObject(_unistype, metaclass=_metacontextcheck):
     def __repr__(self):
         return "<{}.{} {}>".format(self.__class__.__module__, self.__class__.__name__, self.__dict__.keys())
 
-_CACHE = {}
-if SCHEMA_CACHE_DIR:
-    try:
-        os.makedirs(SCHEMA_CACHE_DIR)
-    except FileExistsError:
-        pass
-    except OSError as exp:
-        raise
-    for n in os.listdir(SCHEMA_CACHE_DIR):
-        with open(SCHEMA_CACHE_DIR + "/" + n) as f:
-            schema = json.load(f)
-            _CACHE[schema['id']] = schema
+def _encode(v):
+    return codec.dumps(v)
+def _static(v, owner):
+    if isinstance(v, UnisObject):
+        return False
+    elif isinstance(v, (List, Local)):
+        if v._rt_parent is not owner:
+            return False
+        children = v._rt_ls if isinstance(v, List) else v.__dict__.values()
+        return all(_static(x, owner) for x in children)
+    return True
+
+@trace("unis.models")
+class Serializer(object):
+    """
+    :param list[str] exclude: (optional) Attributes to omit from the encoded resources.
+    
+    Encodes :class:`UnisObjects <unis.models.models.UnisObject>` directly to ``bytes``.
+    Each resource caches the encoded form of its attributes, attributes are only
+    re-encoded after they are modified.  Attributes containing references to other
+    resources are always re-encoded.
+    """
+    def __init__(self, exclude=None):
+        self.exclude = set(exclude or [])
+    def write(self, res, buf, ctx=None):
+        """
+        :param res: Resource to encode.
+        :param buf: Writable binary buffer.
+        :param ctx: Context of the current operation.
+        :type res: :class:`UnisObject <unis.models.models.UnisObject>`
+        
+        Write the json encoding of a single resource to ``buf``.
+        """
+        res = res.getObject() if isinstance(res, Context) else res
+        buf.write(b"{")
+        for k,v in list(res.__dict__.items()):
+            if k in res._rt_remote and k not in self.exclude and k != "$schema":
+                try:
+                    fragment = res._fragment(k, v, ctx)
+                except SkipResource:
+                    continue
+                buf.write(fragment)
+                buf.write(b",")
+        buf.write(b'"$schema":')
+        buf.write(_encode(res._rt_schema['id']))
+        buf.write(b"}")
+    def encode(self, res, ctx=None):
+        """
+        :param res: Resource to encode.
+        :param ctx: Context of the current operation.
+        :type res: :class:`UnisObject <unis.models.models.UnisObject>`
+        :returns: ``bytes`` containing the json encoding of the resource.
+        """
+        buf = io.BytesIO()
+        self.write(res, buf, ctx)
+        return buf.getvalue()
+    def dump(self, resources, buf, ctx=None):
+        """
+        :param resources: Resources to encode.
+        :param buf: Writable binary buffer.
+        :param ctx: Context of the current operation.
+        :type resources: list[:class:`UnisObject <unis.models.models.UnisObject>`]
+        
+        Write a json list containing each resource in ``resources`` to ``buf``.
+        """
+        buf.write(b"[")
+        for i, res in enumerate(resources):
+            if i: buf.write(b",")
+            self.write(res, buf, ctx)
+        buf.write(b"]")
+    def dumps(self, resources, ctx=None):
+        """
+        :param resources: Resources to encode.
+        :param ctx: Context of the current operation.
+        :type resources: list[:class:`UnisObject <unis.models.models.UnisObject>`]
+        :returns: ``bytes`` containing a json list of the encoded resources.
+        """
+        buf = io.BytesIO()
+        self.dump(resources, buf, ctx)
+        return buf.getvalue()
+
+class _SchemaStore(dict):
+    """
+    Lazily populated mapping from schema id to JSON Schema document.  Schemas are
+    read on first use from the local schema cache, then the bundled schema pack,
+    and finally fetched from the network and written back to the local cache.
+    Copies placed in the local cache therefore take precedence over the pack.
+    """
+    def __init__(self, pack_dir, cache_dir):
+        self._pack_dir, self._cache_dir, self._pack = pack_dir, cache_dir, None
+    def __missing__(self, uri):
+        key = uri if uri.endswith('#') else uri + '#'
+        if key != uri and key in self:
+            return self[key]
+        schema = self._from_cache(key) or self._from_pack(key) or self._from_remote(key)
+        self[key] = self[schema.get('id', key)] = schema
+        return schema
+
+    @property
+    def version(self):
+        """
+        :returns: Version of the bundled schema pack or ``None`` if no pack is available.
+        """
+        return self._index().get('version', None)
+    def _index(self):
+        if self._pack is None:
+            try:
+                with open(os.path.join(self._pack_dir, 'index.json')) as f:
+                    self._pack = json.load(f)
+            except (OSError, ValueError):
+                self._pack = {}
+        return self._pack
+    def _from_pack(self, uri):
+        n = self._index().get('schemas', {}).get(uri, None)
+        if n:
+            with open(os.path.join(self._pack_dir, n)) as f:
+                return json.load(f)
+    def _from_cache(self, uri):
+        if self._cache_dir:
+            try:
+                with open(os.path.join(self._cache_dir, uri.replace('/', ''))) as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                pass
+    def _from_remote(self, uri):
+        schema = requests.get(uri).json()
+        if self._cache_dir:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            with open(os.path.join(self._cache_dir, schema.get('id', uri).replace('/', '')), 'w') as f:
+                json.dump(schema, f)
+        return schema
+
+_CACHE = _SchemaStore(SCHEMA_PACK_DIR, SCHEMA_CACHE_DIR)
+_HANDLERS = {'http': _CACHE.__getitem__, 'https': _CACHE.__getitem__}
+
+def _isdescriptor(cls, n):
+    return any(isinstance(c.__dict__.get(n, None), _attr) for c in cls.__mro__)
 
 @trace.tlong("unis.models")
 def _schemaFactory(schema, n, tys, raw=False):
@@ -726,7 +887,9 @@ def _schemaFactory(schema, n, tys, raw=False):
             cls._rt_defaults.update({k:v for k,v in _props(schema).items()})
             if "$schema" in cls._rt_defaults: del cls._rt_defaults['$schema']
             setattr(cls, '$schema', schema['id'])
-            cls._rt_schema, cls._rt_resolver = schema, jsonschema.RefResolver(schema['id'], schema, _CACHE)
+            cls._rt_schema, cls._rt_resolver = schema, jsonschema.RefResolver(schema['id'], schema, handlers=_HANDLERS)
+            cls._rt_names = frozenset(cls.names)
+            cls._rt_fields = cls._rt_fields | {k for k in schema.get('properties', {}).keys() if not _isdescriptor(cls, k)}
             cls.__doc__ = schema.get('description', None)
         
         def __call__(cls, *args, **kwargs):
@@ -734,7 +897,8 @@ def _schemaFactory(schema, n, tys, raw=False):
             return Context(instance, None) if not raw else instance
         
         def __instancecheck__(self, other):
-            return hasattr(other, 'names') and not set(self.names) - set(other.names)
+            names = getattr(other, '_rt_names', None)
+            return names is not None and self._rt_names <= names
     return _jsonMeta
 
 @trace("unis.models")
@@ -743,14 +907,10 @@ class _SchemaCache(object):
     def get_class(self, schema_uri, class_name=None, raw=False):
         key = (schema_uri, raw)
         def _make_class():
-            schema = _CACHE.get(schema_uri, None) or requests.get(schema_uri).json()
-            if SCHEMA_CACHE_DIR and schema_uri not in _CACHE:
-                with open(SCHEMA_CACHE_DIR + "/" + schema['id'].replace('/', ''), 'w') as f:
-                    json.dump(schema, f)
+            schema = _CACHE[schema_uri]
             parents = [self.get_class(p['$ref'], None, True) for p in schema.get('allOf', [])] or [UnisObject]
             pmeta = [type(p) for p in parents]
             meta = _schemaFactory(schema, class_name or schema['name'], pmeta, raw)
-            _CACHE[schema['id']] = schema
             self._CLASSES[key] = meta(class_name or schema['name'], tuple(parents), {})
             return self._CLASSES[key]
         return self._CLASSES.get(key, None) or _make_class()
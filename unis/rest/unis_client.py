@@ -1,5 +1,5 @@
 import asyncio, requests, socket, websockets as ws
-import copy, itertools, json, ssl, time
+import copy, itertools, ssl, time
 
 from aiohttp import ClientSession
 from aiohttp.client_exceptions import ClientConnectionError
@@ -12,7 +12,7 @@ from websockets.exceptions import ConnectionClosed
 
 from unis.settings import MIME
 from unis.exceptions import ConnectionError, UnisReferenceError
-from unis.utils import asynchronous
+from unis.utils import asynchronous, codec
 
 class CID(str):
     """
@@ -116,12 +116,13 @@ class UnisProxy(object):
     def post(cls, cols):
         """ 
         :param cols: Dictionary containing the resources to be submitted.
-        :type cols: dict[tuple[:class:`CID <unis.rest.unis_client.CID>`, str], List[dict[str, str]]]
+        :type cols: dict[tuple[:class:`CID <unis.rest.unis_client.CID>`, str], List[dict[str, str]] or bytes]
         :return: list of dictionaries containing the updated values for the posted resources.
         
         Submit the contents of a set of records to a data source.  The ``cols`` parameter is a dictionary wherein 
         :class:`UnisObjects <unis.models.models.UnisObject>` are keyed by a (:class:`CID <unis.rest.unis_client.CID>`, ``collection_name``) pair.
         The resulting dictionaries contain the entire resource including all fields whether altered or not.
+        Values may also be a pre-encoded json list as ``bytes``.
         """
         async def _f():
             async with ClientSession() as sess:
@@ -162,6 +163,30 @@ class UnisProxy(object):
                 return await UnisClient.instances[src].delete("/".join([self._name, rid]), sess)
         return asynchronous.make_async(awrap)
 
+    def delete_many(self, targets, threads=10):
+        """
+        :param targets: List of (client identifier, resource identifier) pairs to delete.
+        :param int threads: (optional) Maximum number of requests in flight per data store.
+        :type targets: list[tuple[:class:`CID <unis.rest.unis_client.CID>`, str]]
+        :return: list of booleans, ``True`` where the data store accepted the delete.
+
+        Delete many resources from their data stores.  All requests share a single session and
+        at most **threads** requests are outstanding against any one data store at a time.  The
+        result is aligned with **targets**; rejected deletes are reported as ``False``.
+        """
+        async def awrap():
+            limits = {src: asyncio.Semaphore(threads) for src,_ in targets}
+            async def _delete(src, rid, sess):
+                async with limits[src]:
+                    try:
+                        await UnisClient.instances[src].delete("/".join([self._name, rid]), sess)
+                    except ConnectionError:
+                        return False
+                    return True
+            async with ClientSession() as sess:
+                return await asyncio.gather(*[_delete(src, rid, sess) for src,rid in targets])
+        return asynchronous.make_async(awrap) if targets else []
+
     async def subscribe(self, src, cb):
         """ 
         :param src: List of client identifiers for target data stores
@@ -359,7 +384,7 @@ class UnisClient(metaclass=_SingletonOnUID):
                     self._socket = await asyncio.wait_for(fut, timeout=10)
                     self._lock = True
                     for col in self._channels.keys():
-                        await self._socket.send(json.dumps({'query':{}, 'resourceType': col}))
+                        await self._socket.send(codec.dumps({'query':{}, 'resourceType': col}).decode('utf-8'))
                     self._lock = False
                 except OSError:
                     msg = "[{}]No websocket connection, retrying...".format(urlparse(self._url).netloc)
@@ -371,8 +396,9 @@ class UnisClient(metaclass=_SingletonOnUID):
             try:
                 while True:
                     try:
-                        msg = json.loads(await self._socket.recv())
-                        for cb in self._channels[msg['headers']['collection']]:
+                        msg = codec.loads(await self._socket.recv())
+                        col = msg['headers']['collection']
+                        for cb in self._channels.get(col) or self._channels.get(col.split('/')[0], []):
                             cb(msg['data'], msg['headers']['action'])
                     except (TimeoutError, asyncio.exceptions.TimeoutError):
                         if not self._alive: return
@@ -447,14 +473,16 @@ class UnisClient(metaclass=_SingletonOnUID):
     async def post(self, col, data, sess):
         """
         :param str col: Name of the collection to post data
-        :param dict[str,str] data: Dictionary containing the data to send to store
+        :param data: Dictionary containing the data to send to store or a pre-encoded ``bytes`` body
         :param sess: Session object for request
+        :type data: dict[str,str] or bytes
         :type sess: :class:`aiohttp.ClientSession`
         :return: List of dictionaries containing the resources posted to the store.
         :rtype: coroutine
         """
         url, hdr = self._get_conn_args(col)
-        return await self._do(sess.post, url, data=json.dumps(data), headers=hdr)
+        data = data if isinstance(data, bytes) else codec.dumps(data)
+        return await self._do(sess.post, url, data=data, headers=hdr)
 
     def synchronous_post(self, col, data):
         """
@@ -463,7 +491,7 @@ class UnisClient(metaclass=_SingletonOnUID):
         :return: List of dictionaries containing the resources posted to the store.
         """
         url, hdr = self._get_conn_args(col)
-        return requests.post(url, data=json.dumps(data), headers=hdr)
+        return requests.post(url, data=codec.dumps(data), headers=hdr)
     
     async def put(self, col, data, sess):
         """
@@ -476,7 +504,7 @@ class UnisClient(metaclass=_SingletonOnUID):
         """
         url, hdr = self._get_conn_args(col)
         try:
-            async with sess.put(url, data=json.dumps(data), headers=hdr, ssl=self._sslcontext, timeout=1) as resp:
+            async with sess.put(url, data=codec.dumps(data), headers=hdr, ssl=self._sslcontext, timeout=1) as resp:
                 await self._check_response(resp)
                 return True
         except (asyncio.TimeoutError, ClientConnectionError):
@@ -502,7 +530,7 @@ class UnisClient(metaclass=_SingletonOnUID):
         :rtype: coroutine
         """
         async def _add_channel():
-            await self._socket.send(json.dumps({'query':{}, 'resourceType': col}))
+            await self._socket.send(codec.dumps({'query':{}, 'resourceType': col}).decode('utf-8'))
 
         while self._lock: await asyncio.sleep(0)
         if col not in self._channels:
@@ -534,8 +562,8 @@ class UnisClient(metaclass=_SingletonOnUID):
         :rtype: List[Dict[str, Any]]
         """
         if 200 <= r.status <= 299:
-            try: resp = json.loads(str(await r.read(), 'utf-8'))
-            except json.decoder.JSONDecodeError: resp = []
+            try: resp = codec.loads(await r.read())
+            except codec.DecodeError: resp = []
             return resp if isinstance(resp, list) else [resp]
         else:
             raise ConnectionError("Error from unis - [{}] {}".format(r.status, await r.text()), r.status)
@@ -5,9 +5,10 @@ from lace.logging import trace
 
 from unis.models import schemaLoader
 from unis.models.lists import UnisCollection
-from unis.models.models import Context
+from unis.models.models import Context, Serializer
 from unis.rest import UnisProxy, UnisClient
 from unis.exceptions import UnisReferenceError
+from unis.measurements import DataWriter
 from unis.utils import asynchronous
 
 from urllib.parse import urlparse
@@ -51,6 +52,7 @@ class ObjectLayer(object):
     """
     def __init__(self, settings):
         self.settings, self._pending, self._services = settings, set(), []
+        self._routes = {}
     
     def __getattr__(self, n):
         try:
@@ -81,6 +83,35 @@ class ObjectLayer(object):
             self.addSources(new_sources)
             return self._cache(col).get([href])
     
+    def find_many(self, hrefs):
+        """
+        :param list[str] hrefs: links to the references to locate.
+        :return: list of :class:`UnisObject <unis.models.models.UnisObject>` or ``None``
+        
+        ``find_many`` locates a set of resources as with :meth:`find <unis.runtime.oal.ObjectLayer.find>`,
+        but groups the references by collection so that each collection resolves its members in a single
+        request per data store.  The result is ordered as ``hrefs``, with ``None`` in place of any reference
+        that could not be resolved.
+        """
+        groups, results = defaultdict(list), {}
+        for href in hrefs:
+            groups[urlparse(href).path.split('/')[1]].append(href)
+        for col, refs in groups.items():
+            try:
+                try:
+                    found = self._cache(col).get(refs)
+                except UnisReferenceError as e:
+                    self.addSources([{'url': r, 'default': False, 'enabled': True} for r in e.hrefs])
+                    found = self._cache(col).get(refs)
+            except UnisReferenceError:
+                found = []
+                for href in refs:
+                    try: found.append(self._cache(col).get([href])[0])
+                    except UnisReferenceError: found.append(None)
+            except KeyError:
+                continue
+            results.update({k:v for k,v in zip(refs, found) if v is not None and not isinstance(v, str)})
+        return [results.get(href, None) for href in hrefs]
     
     def flush(self):
         """
@@ -103,16 +134,12 @@ class ObjectLayer(object):
                     self._do_update({(res.getSource(), res.getCollection().name): [res]})
     
     def _do_update(self, pending):
-        request = {}
+        request, serializer = {}, Serializer(exclude=['ts'])
         for (cid, collection), reslist in pending.items():
             self._cache(collection).pre_flush(reslist)
             self._cache(collection).locked = True
             valid = all([i.validate() for i in reslist])
-            items = [i.to_JSON() for i in reslist]
-            for item in items:
-                if 'ts' in item:
-                    del item['ts']
-            request[(cid, collection)] = items
+            request[(cid, collection)] = serializer.dumps(reslist, self)
         
         response = []
         try:
@@ -121,19 +148,21 @@ class ObjectLayer(object):
             raise
         finally:
             for (_, col), items in pending.items():
-                self._cache(col).post_flush(items)
-                for r in items:
-                    r = r if isinstance(r, Context) else Context(r, self)
-                    try:
-                        resp = next(o for o in response if o['id'] == r.id)
-                    except StopIteration:
-                        continue
-                    r.__dict__["selfRef"] = resp["selfRef"]
-                    self._cache(col).updateIndex(r)
-                    try: self._pending.remove(r)
-                    except KeyError: continue
-                    r._staged = False
-                self._cache(col).locked = False
+                try:
+                    self._cache(col).post_flush(items)
+                    for r in items:
+                        r = r if isinstance(r, Context) else Context(r, self)
+                        try:
+                            resp = next(o for o in response if o['id'] == r.id)
+                        except StopIteration:
+                            continue
+                        r.__dict__["selfRef"] = resp["selfRef"]
+                        self._cache(col).updateIndex(r)
+                        try: self._pending.remove(r)
+                        except KeyError: continue
+                        r._staged = False
+                finally:
+                    self._cache(col).locked = False
     
     def addSources(self, hrefs):
         """
@@ -155,6 +184,7 @@ class ObjectLayer(object):
                 col = UnisCollection.get_collection(ref[0], model, self)
                 for service in self._services:
                     service.attach(col)
+        self._route()
 
         asynchronous.make_async(asyncio.gather, *[c.addSources(clients) for c in self._cache()])
 
@@ -162,19 +192,42 @@ class ObjectLayer(object):
         _p = lambda c: c.name in self.settings['cache']['preload'] or self.settings['cache']['mode'] == 'greedy'
         values = [c.load() for c in self._cache() if _p(c)]
         
-    def _insert(self, res):
+    def _instance(self, res):
         try:
-            res = schemaLoader.get_class(res["$schema"]) if isinstance(res, dict) else res
+            res = schemaLoader.get_class(res["$schema"])(res) if isinstance(res, dict) else res
         except KeyError:
             raise ValueError("No schema in dict, cannot continue")
-            
+        res = res if isinstance(res, Context) else Context(res, self)
         res.getObject().__dict__['id'] = res.id or str(uuid.uuid4())
         res.setRuntime(self)
+        return res
+    def _insert(self, res):
+        res = self._instance(res)
         res.setObject(self._cache(self.getModel(res.names)).append(res.getObject()))
         return res
+    def _insert_many(self, resources):
+        resources, groups, models = [self._instance(r) for r in resources], defaultdict(list), {}
+        for res in resources:
+            ty = type(res.getObject())
+            if ty not in models:
+                models[ty] = self.getModel(res.names)
+            groups[models[ty]].append(res)
+        for col, members in groups.items():
+            for res, obj in zip(members, self._cache(col).append_many([r.getObject() for r in members])):
+                res.setObject(obj)
+        return resources
 
     def _remove(self, res):
         self._cache(self.getModel(res.names)).remove(res)
+    def _remove_many(self, resources):
+        groups, models = defaultdict(list), {}
+        for res in resources:
+            ty = type(res.getObject())
+            if ty not in models:
+                models[ty] = self.getModel(res.names)
+            groups[models[ty]].append(res)
+        for col, members in groups.items():
+            self._cache(col).remove_many(members)
         
     def getModel(self, names):
         """
@@ -185,14 +238,15 @@ class ObjectLayer(object):
         In order to support json schema style inheritence, each resource contains a list of names
         similar to the python MRO.
         """
-        names = [n for n in names]
-        for name in names:
-            for col in self._cache():
-                try: names[names.index(col.model._rt_schema["name"])] = col
-                except ValueError: pass
-        for col in names:
-            if not isinstance(col, str): return col.name
+        for retry in [False, True]:
+            if retry:
+                self._route()
+            for name in names:
+                if name in self._routes:
+                    return self._routes[name]
         raise ValueError(f"Resource type {names} not found in ObjectLayer")
+    def _route(self):
+        self._routes = {c.model._rt_schema["name"]: c.name for c in self._cache()}
     
     def about(self):
         """
@@ -203,11 +257,16 @@ class ObjectLayer(object):
         return [c.name for c in self._cache()]
     
     def shutdown(self):
+        for service in self._services:
+            service.shutdown()
         self.flush()
-        UnisClient.shutdown()
+        try:
+            DataWriter.get().flush()
+        finally:
+            UnisClient.shutdown()
     def __contains__(self, resource):
         try:
-            col = next(c for c in self._cache() if c.model._rt_schema["name"] in resource.names)
-            return isinstance(resource, type) or resource in self._cache(col.name)
-        except StopIteration:
+            col = self.getModel(resource.names)
+            return isinstance(resource, type) or resource in self._cache(col)
+        except ValueError:
             return False
@@ -0,0 +1,246 @@
+import io, mmap, os, struct, threading, time
+
+from lace.logging import trace
+from lace import logging
+
+from unis.models import schemaLoader
+from unis.models.models import Serializer, _SCALARS
+from unis.services.abstract import RuntimeService
+from unis.utils import codec
+
+MAGIC = b"UNISRPL1"
+_HEADER = struct.Struct("!8sQQ")
+
+@trace("unis.runtime")
+class ReplicaPublisher(RuntimeService):
+    """
+    :param str path: File to publish the replica to.
+    :param float interval: (optional) Minimum number of seconds between publications.
+    :param list[str] collections: (optional) Names of the collections to publish, defaults to all collections.
+
+    :class:`ReplicaPublisher <unis.runtime.replica.ReplicaPublisher>` writes the loaded contents
+    of a :class:`Runtime's <unis.runtime.runtime.Runtime>` collections, along with their indices,
+    to a single file intended to be memory mapped by worker processes through
+    :class:`ReplicaReader <unis.runtime.replica.ReplicaReader>`.  Only the publishing process
+    maintains subscriptions to the data stores.
+
+    Changes to the published collections are coalesced and republished at most once every
+    **interval** seconds.  Each publication replaces the file atomically; readers holding
+    the previous generation continue to see it until they :meth:`refresh <unis.runtime.replica.ReplicaReader.refresh>`.
+    Publication stops when the runtime is shut down.
+    """
+    def __init__(self, path, interval=1.0, collections=None):
+        self.path, self.interval, self.generation = path, interval, 0
+        self._names, self._cols = collections, {}
+        self._dirty, self._stop, self._lock = threading.Event(), threading.Event(), threading.Lock()
+        self._thread = None
+
+    @property
+    def targets(self):
+        return [c.name for c in self.runtime._oal._cache() if self._names is None or c.name in self._names]
+
+    def initialize(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name="unis-replica")
+        self._thread.start()
+    def shutdown(self):
+        self._stop.set()
+        self._dirty.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+    def attach(self, col):
+        super().attach(col)
+        if (self._names is None or col.name in self._names) and col.name not in self._cols:
+            self._cols[col.name] = col
+            col.addCallback(lambda res, ty: self._dirty.set())
+            self._dirty.set()
+
+    def publish(self):
+        """
+        :return: The generation number of the new replica.
+
+        Write the current contents of the published collections to the replica file.
+        """
+        with self._lock:
+            self.generation += 1
+            directory, body, serializer = {}, io.BytesIO(), Serializer()
+            for name, col in self._cols.items():
+                keys = [k for k in col._obj._indices.keys() if k != 'id']
+                resources, indices = {}, {k: {} for k in keys}
+                for res in col._obj._snapshot():
+                    uid, start = res.__dict__.get('id'), body.tell()
+                    serializer.write(res, body)
+                    resources[uid] = [start, body.tell() - start]
+                    for k in keys:
+                        v = res.__dict__.get(k, None)
+                        if v is not None and isinstance(v, _SCALARS):
+                            indices[k].setdefault(v, []).append(uid)
+                directory[name] = {"resources": resources,
+                                   "indices": {k: list(v.items()) for k,v in indices.items()}}
+            directory = codec.dumps({"collections": directory})
+            tmp = "{}.{}.tmp".format(self.path, os.getpid())
+            with open(tmp, 'wb') as f:
+                f.write(_HEADER.pack(MAGIC, self.generation, len(directory)))
+                f.write(directory)
+                f.write(body.getbuffer())
+            os.replace(tmp, self.path)
+            return self.generation
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._dirty.wait()
+            if self._stop.wait(self.interval):
+                break
+            self._dirty.clear()
+            try:
+                self.publish()
+            except Exception as e:
+                logging.getLogger("unisrt").warn("Failed to publish replica '{}' - {}".format(self.path, e))
+
+@trace("unis.runtime")
+class ReplicaCollection(object):
+    """
+    A read-only view of a single collection within a replica.  Resources are decoded
+    from the shared mapping the first time they are accessed.  Resources returned by
+    the view are not attached to a :class:`Runtime <unis.runtime.runtime.Runtime>`;
+    changes made to them are not published.
+    """
+    def __init__(self, name, buf, base, desc):
+        self.name = name
+        self._buf, self._base = buf, base
+        self._resources, self._rawindices = desc['resources'], desc['indices']
+        self._indices, self._decoded = {}, {}
+    def __len__(self):
+        return len(self._resources)
+    def __contains__(self, uid):
+        return uid in self._resources
+    def __iter__(self):
+        for uid in self._resources:
+            yield self[uid]
+    def __getitem__(self, uid):
+        """
+        :param str uid: Identifier of the resource.
+        :return: :class:`UnisObject <unis.models.models.UnisObject>`
+        :raises KeyError: If the resource is not in the replica.
+        """
+        if uid not in self._decoded:
+            offset, length = self._resources[uid]
+            start = self._base + offset
+            doc = codec.loads(self._buf[start:start + length])
+            self._decoded[uid] = schemaLoader.get_class(doc['$schema'])(doc)
+        return self._decoded[uid]
+
+    def index(self, k):
+        """
+        :param str k: Indexed field.
+        :return: dictionary mapping field values to lists of resource identifiers.
+        :raises KeyError: If the field is not indexed in the replica.
+        """
+        if k not in self._indices:
+            self._indices[k] = dict((v, ids) for v,ids in self._rawindices[k])
+        return self._indices[k]
+
+    def where(self, pred):
+        """
+        :param pred: Predicate used to filter resources.
+        :type pred: callable or dictionary
+        :return: Generator of :class:`UnisObjects <unis.models.models.UnisObject>`
+
+        As :meth:`UnisCollection.where <unis.models.lists.UnisCollection.where>`.  Equality
+        tests over fields indexed by the publisher are answered from the replica's indices.
+        """
+        op = {
+            "gt": lambda b: lambda a: a > b,
+            "ge": lambda b: lambda a: a >= b,
+            "lt": lambda b: lambda a: a < b,
+            "le": lambda b: lambda a: a <= b,
+            "eq": lambda b: lambda a: a == b
+        }
+        if callable(pred):
+            for v in self:
+                if pred(v): yield v
+            return
+        subset, rest = None, []
+        for k,v in pred.items():
+            v = v if isinstance(v, dict) else { "eq": v }
+            for f,x in v.items():
+                if f == "eq" and k in self._rawindices:
+                    ids = set(self.index(k).get(x, []))
+                    subset = ids if subset is None else subset & ids
+                else:
+                    rest.append((k, op[f](x)))
+        for uid in (self._resources if subset is None else [u for u in self._resources if u in subset]):
+            res = self[uid]
+            try:
+                if all([f(getattr(res, k)) for k,f in rest]):
+                    yield res
+            except (AttributeError, TypeError):
+                pass
+
+@trace("unis.runtime")
+class ReplicaReader(object):
+    """
+    :param str path: Replica file written by a :class:`ReplicaPublisher <unis.runtime.replica.ReplicaPublisher>`.
+
+    :class:`ReplicaReader <unis.runtime.replica.ReplicaReader>` attaches read-only to a replica
+    through a shared memory mapping.  Any number of worker processes may read the same replica
+    while a single process owns the subscriptions.  Collections are accessed by name::
+
+        replica = ReplicaReader("/dev/shm/unis.replica")
+        for node in replica["nodes"].where({"name": "switch01"}):
+            ...
+
+    Each generation is mapped separately.  The mapping of a previous generation is released
+    once the reader has refreshed and no views taken from it remain; :meth:`close <unis.runtime.replica.ReplicaReader.close>`
+    releases the current mapping.
+    """
+    def __init__(self, path):
+        self.path, self.generation = path, 0
+        self._stat, self._cols, self._buf = None, {}, None
+        self.refresh()
+
+    def refresh(self):
+        """
+        :return: True if a new generation was attached.
+
+        Attach to the latest generation of the replica if the publisher has replaced it.
+        Views obtained before the refresh continue to read the generation they were taken from.
+        """
+        st = os.stat(self.path)
+        if self._stat == (st.st_ino, st.st_mtime_ns):
+            return False
+        with open(self.path, 'rb') as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, generation, length = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a replica file - {}".format(self.path))
+        directory = codec.loads(buf[_HEADER.size:_HEADER.size + length])
+        base = _HEADER.size + length
+        self._cols = {n: ReplicaCollection(n, buf, base, d) for n,d in directory['collections'].items()}
+        self._stat, self.generation, self._buf = (st.st_ino, st.st_mtime_ns), generation, buf
+        return True
+
+    def close(self):
+        """
+        Release the mapping of the current generation.  Views taken from the reader may no
+        longer be used; a later :meth:`refresh <unis.runtime.replica.ReplicaReader.refresh>`
+        attaches to the latest generation again.
+        """
+        if self._buf is not None:
+            self._buf.close()
+        self._stat, self._cols, self._buf = None, {}, None
+
+    @property
+    def collections(self):
+        """
+        :return: list of collection names in the replica.
+        """
+        return list(self._cols.keys())
+    def __contains__(self, n):
+        return n in self._cols
+    def __getitem__(self, n):
+        return self._cols[n]
+    def __getattr__(self, n):
+        try:
+            return self.__dict__['_cols'][n]
+        except KeyError:
+            raise AttributeError(n)
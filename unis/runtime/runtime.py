@@ -35,6 +35,7 @@ class Runtime(object):
         * **preload:** List of collections as strings to preload on startup.
         * **mode:** (*exponential*) Mode as string detemines how new resources are queried.
         * **growth:** (*2*) Value as integer determines how many new resources are queried per request.
+        * **max_resident:** (*None*) Maximum number of resources held in memory per collection, either as an integer or as a dictionary keyed by collection name.  The collection drops its reference to the least recently used unmodified resources, which are reused if still referenced elsewhere or refetched on demand.  Full loads and scans return every resource and trim once complete.
     
     * **proxy**
         * **threads:** (*10*) Number of threads used by proxies.
@@ -44,8 +45,12 @@ class Runtime(object):
     * **measurements**
         * **read_history:** (*True*) Read in full history of measurements when measurement is added.
         * **subscribe:** (*True*) Subscribe to recieve measurements in realtime.
-        * **batch_size:** (*0*) Specifies the number of new measurements to take before pushing to measurement store. (This takes precedence over **batch_until**)
-        * **batch_until:** (*0*) Specifies the amount of time to wait for new measurements before pushing to measurement store.
+        * **multiplex:** (*False*) Receive realtime measurements through a single ``data`` subscription per data store.  Requires a data store that publishes readings on the ``data`` channel; otherwise each measurement subscribes individually.
+        * **batch_size:** (*0*) Specifies the number of new measurements, across all measurements on a measurement store, to take before pushing to the store. (This takes precedence over **batch_until**)
+        * **batch_until:** (*0*) Specifies the amount of time in milliseconds to wait for new measurements before pushing to measurement store.
+        * **page_size:** (*10000*) Maximum number of readings requested at once when loading measurement history.
+        * **history:** (*0*) Number of recent readings each measurement keeps in memory for window queries, ``0`` disables the history.
+        * **rollups:** (*[]*) List of ``[interval, retention]`` pairs, in microseconds and buckets, of downsampled summaries each measurement maintains.
     """
     def _build_settings(self):
         def _ls(v):
@@ -168,6 +173,23 @@ class Runtime(object):
             return self._oal._insert(resource).commit(publish_to=publish_to)
         return self._oal._insert(resource)
 
+    def insert_many(self, resources, track=False, publish_to=None):
+        """
+        :param resources: Resources to be added to the runtime for tracking.
+        :param bool track: (optional) Indicates whether the resources should be marked for insertion into a remote data store. Default ``False``.
+        :param str publish_to: (optional) If track is ``True``, this indicates which remote data store to publish to.
+        :type resources: list[:class:`UnisObject <unis.models.models.UnisObject>`]
+        :return: list of :class:`UnisObject <unis.models.models.UnisObject>`
+        
+        As :meth:`insert <unis.runtime.runtime.Runtime.insert>` for many resources.  Resources are routed to
+        their collections once per type, stored and indexed in bulk, and services receive the resulting
+        ``new`` events as a single burst per collection.
+        """
+        result = self._oal._insert_many(resources)
+        if track:
+            [r.track(publish_to=publish_to) for r in result]
+        return result
+
     def delete(self, resource):
         """
         :param resource: Resource to be removed from the runtime.
@@ -177,6 +199,18 @@ class Runtime(object):
         note:: This operation will invalidate the object, preventing further modifications.
         """
         self._oal._remove(resource)
+
+    def delete_many(self, resources):
+        """
+        :param resources: Resources to be removed from the runtime.
+        :type resources: list[:class:`UnisObject <unis.models.models.UnisObject>`]
+
+        As :meth:`delete <unis.runtime.runtime.Runtime.delete>` for many resources.  Resources are
+        grouped by collection and the corresponding remote deletes are issued concurrently.
+
+        note:: This operation will invalidate the objects, preventing further modifications.
+        """
+        self._oal._remove_many(resources)
     
     def addService(self, service):
         """
@@ -199,8 +233,8 @@ class Runtime(object):
             instance = service()
         if not isinstance(instance, RuntimeService):
             raise ValueError("Service object must be of type RuntimeService - {}".format(type(instance)))
-        if type(instance) not in self._oal._services:
-            self._oal._services.append(service)
+        if type(instance) not in [type(s) for s in self._oal._services]:
+            self._oal._services.append(instance)
             instance.setRuntime(self)
             instance.initialize()
             for target in instance.targets:
@@ -217,6 +251,7 @@ class Runtime(object):
         :param sig: (optional) This param is required for internal use and should not be used.
         :param frame: (optional) This param is required for internal use and should not be used.
         :return: None
+        :raises ConnectionError: If queued measurements could not be sent; connections are removed regardless.
         
         Shutdown the runtime, removing connections from remote instances.
         """
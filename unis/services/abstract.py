@@ -62,6 +62,12 @@ class RuntimeService(metaclass=ServiceMetaclass):
         is complete but before events are handled.
         """
         pass
+    def shutdown(self):
+        """
+        Can be overridden by inheriting classes to release threads or other resources held by the
+        service.  Called by the :class:`Runtime <unis.runtime.runtime.Runtime>` when it is shut down.
+        """
+        pass
     def attach(self, col):
         """
         :param col: The collection to attach this service to.
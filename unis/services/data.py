@@ -2,11 +2,11 @@ import json, requests
 
 from lace.logging import trace
 
-from unis.measurements import DataCollection
+from unis.measurements import DataCollection, DataRouter
 from unis.models import Metadata, Data, Node
 from unis.rest import UnisClient
 from unis.services.abstract import RuntimeService
-from unis.services.event import new_event, commit_event, postflush_event
+from unis.services.event import new_event, commit_event, postflush_event, delete_event
 
 @trace("unis.services")
 class DataService(RuntimeService):
@@ -31,3 +31,8 @@ class DataService(RuntimeService):
     def new_md(self, md):
         if md.selfRef:
             md.data = DataCollection(md, self.runtime)
+
+    @delete_event('metadata')
+    def remove_md(self, md):
+        if isinstance(getattr(md, 'data', None), DataCollection) and self.runtime.settings["measurements"]["multiplex"]:
+            DataRouter.get().unfollow(md.data)
@@ -38,8 +38,7 @@ class UnisGrapher(RuntimeService):
             edge = self._get_full_edge(port)
         except ValueError:
             return False
-        if not self.runtime.graph.hasEdge(*edge):
-            self.runtime.graph.edges.append(edge)
+        self.runtime.graph.addEdge(*edge)
         return True
     
     @new_update_event('links')
@@ -77,8 +76,7 @@ class UnisGrapher(RuntimeService):
         registers the node as a vertex and - if a full edge is available - adds
         an edge to the graph.
         """
-        if node not in self.runtime.graph.vertices:
-            self.runtime.graph.vertices.append(node)
+        self.runtime.graph.addVertex(node)
 
         for p in node.ports:
             p.node = node
@@ -6,6 +6,7 @@ from copy import copy
 from lace.logging import trace
 
 from unis.models import Node, Port, Link
+from unis.utils import codec
 
 from pprint import pprint
 
@@ -28,6 +29,12 @@ class Graph(object):
 
     The `subnet` and `prefix` parameters are used for vertex generation, when new vertices are added,
     they are given an interface layer 4 IP address and name if not present.
+
+    Vertices are indexed by object, and by ``id`` when one is set, and each vertex keeps a map of its
+    neighbors to the :class:`Links <unis.models.models.UnisObject>` connecting them, so vertex membership
+    and edge lookup take constant time.  Vertices and edges must be added through
+    :meth:`addVertex <unis.services.graphbuilder.Graph.addVertex>` and
+    :meth:`addEdge <unis.services.graphbuilder.Graph.addEdge>` to remain indexed.
     """
     def __init__(self, vertices=[], edges=[], db=None, subnet='10.0.0.0/8', prefix=''):
         address, mask = subnet.split("/")
@@ -36,9 +43,10 @@ class Graph(object):
         self.subnet = ".".join(address.split(".")[:(4 - subnet_size)])
         self.subnet += ".{}".format(".".join(["{}" for x in range(subnet_size)]))
         self.prefix = prefix
-        self.vertices = list(vertices)
-        self.edges = list(edges)
-        self._edgeref = set()
+        self.vertices, self.edges = [], []
+        self._ids, self._adj = {}, {}
+        [self.addVertex(v) for v in vertices]
+        [self.addEdge(*e) for e in edges]
         self.height = 0
         self.width  = 0
         if db:
@@ -69,20 +77,98 @@ class Graph(object):
         n = Node({ "name": "{}{}".format(self.prefix, len(self.vertices)) })
         n.svg = {}
         self._rt.insert(n)
-        self.vertices.append(n)
+        self.addVertex(n)
         return n
+    
+    def addVertex(self, v):
+        """
+        :param v: Vertex to add to the graph.
+        :type v: :class:`Node <unis.models.models.UnisObject>`
+        :rtype: boolean
+        
+        Adds a :class:`Node <unis.models.models.UnisObject>` as a graph vertex.  Returns False if
+        the vertex, or a vertex with the same ``id``, is already in the graph.
+        """
+        if self._find(v) is not None:
+            return False
+        if v.id:
+            self._ids[v.id] = v
+        self._adj[v] = {}
+        self.vertices.append(v)
+        return True
+    def _find(self, v):
+        if v in self._adj:
+            return v
+        return self._ids.get(v.id, None) if v.id else None
+    def hasVertex(self, v):
+        """
+        :param v: Vertex to find.
+        :type v: :class:`Node <unis.models.models.UnisObject>`
+        :rtype: boolean
+        """
+        return self._find(v) is not None
+    def __contains__(self, v):
+        return self.hasVertex(v)
+    def getVertex(self, vid):
+        """
+        :param str vid: Identifier of the vertex.
+        :rtype: :class:`Node <unis.models.models.UnisObject>` or NoneType
+        """
+        if vid and vid not in self._ids:
+            # Identifiers may be assigned after the vertex was added
+            for v in self.vertices:
+                if v.id and v.id not in self._ids:
+                    self._ids[v.id] = v
+        return self._ids.get(vid, None)
+    def neighbors(self, v):
+        """
+        :param v: Vertex to find the neighbors of.
+        :type v: :class:`Node <unis.models.models.UnisObject>`
+        :rtype: list[tuple(:class:`Node <unis.models.models.UnisObject>`, :class:`Link <unis.models.models.UnisObject>`)]
+        
+        Returns each vertex reachable over an edge from **v** along with the link connecting them,
+        once for each link.
+        """
+        return [(n, l) for n,links in self._adj.get(self._find(v), {}).items() for l in links]
+    def _links(self, src, dst):
+        return self._adj.get(self._find(src), {}).get(self._find(dst), [])
+    
+    def addEdge(self, src, dst, link):
+        """
+        :param src: Vertex on the ingress side of the edge.
+        :param dst: Vertex on the egress side of the edge.
+        :param link: Link connecting the vertices.
+        :type src: :class:`Node <unis.models.models.UnisObject>`
+        :type dst: :class:`Node <unis.models.models.UnisObject>`
+        :type link: :class:`Link <unis.models.models.UnisObject>`
+        :rtype: boolean
         
+        Adds a directed edge between two vertices, adding the vertices to the graph if needed.
+        Vertices may be connected by any number of links.  Returns False if the edge over **link**
+        is already in the graph.
+        """
+        self.addVertex(src)
+        self.addVertex(dst)
+        links = self._adj[self._find(src)].setdefault(self._find(dst), [])
+        if link in links:
+            return False
+        links.append(link)
+        self.edges.append((src, dst, link))
+        return True
     def hasEdge(self, src, dst, link=None):
         """
         :param src: Vertex on the ingress side of the edge.
         :param dst: Vertex on the egress side of the edge.
+        :param link: (optional) Only detect edges over this link.
         :type src: :class:`Node <unis.models.models.UnisObject>`
         :type dst: :class:`Node <unis.models.models.UnisObject>`
+        :type link: :class:`Link <unis.models.models.UnisObject>`
         :rtype: boolean
         
         Checks for the existance of an edge between two :class:`Nodes <unis.models.models.UnisObject>`.
         """
-        return set([str(hash(src)) + str(hash(dst))]) & self._edgeref
+        links = self._links(src, dst)
+        return bool(links) if link is None else link in links
     def createEdge(self, src, dst):
         """
         :param src: Vertex on the ingress side of the edge.
@@ -100,13 +186,11 @@ class Graph(object):
         p_dst.address.type = "ipv4"
         self._rt.insert(p_src)
         self._rt.insert(p_dst)
-        self._edgeref.add(str(hash(src)) + str(hash(dst)))
-        self._edgeref.add(str(hash(dst)) + str(hash(src)))
         src.ports.append(p_src)
         dst.ports.append(p_dst)
         l = Link({ "directed": False, "endpoints": [p_src, p_dst] })
-        self.edges.append((src, dst, l))
-        self.edges.append((dst, src, l))
+        self.addEdge(src, dst, l)
+        self.addEdge(dst, src, l)
         self._rt.insert(l)
     def getEdge(self, src, dst, directed=False):
         """
@@ -117,12 +201,11 @@ class Graph(object):
         :type dst: :class:`Node <unis.models.models.UnisObject>`
         :rtype: :class:`Link <unis.models.models.UnisObject>` or NoneType
 
-        Find the edge between two vertices, if any.
+        Find the edge between two vertices, if any.  When the vertices are connected by more than
+        one link, the first link added is returned.
         """
-        for n1, n2, l in self.edges:
-            if (n1 == src and n2 == dst) or (not directed and (n2 == src and n1 == dst)):
-                return l
-        return None
+        links = self._links(src, dst) or ([] if directed else self._links(dst, src))
+        return links[0] if links else None
     
     def finalize(self, include_svg=False):
         """
@@ -219,11 +302,10 @@ class Graph(object):
         """
         result = { "nodes": {}, "_processing_level": self.processing_level }
         if self.processing_level:
-            import json
             for n in self.vertices:
                 result["nodes"][n.name] = [n.svg.x, n.svg.y]
-            with open(filename, 'w') as f:
-                f.write(json.dumps(result))
+            with open(filename, 'wb') as f:
+                f.write(codec.dumps(result))
     
     def load(self, filename):
         """
@@ -233,9 +315,8 @@ class Graph(object):
         
         .. warning:: The graph **must** be the same graph to reuse positional metadata.
         """
-        import json
-        with open(filename) as f:
-            layout = json.load(f)
+        with open(filename, 'rb') as f:
+            layout = codec.loads(f.read())
         for node in self.vertices:
             try:
                 node.svg = { "active": False, "x": layout["nodes"][node.name][0], "y": layout["nodes"][node.name][1] }
@@ -452,8 +533,8 @@ class Graph(object):
             g = func(size, degree, db, subnet, _prefix)
             out_gateway = random.choice(g.vertices)
             in_gateway = random.choice(result.vertices)
-            result.vertices.extend(g.vertices)
-            result.edges.extend(g.edges)
+            [result.addVertex(v) for v in g.vertices]
+            [result.addEdge(*e) for e in g.edges]
             result.createEdge(in_gateway, out_gateway)
         
         return result
@@ -22,6 +22,7 @@ if PERISCOPE_ROOT == "$PERISCOPE_ROOT":
 DEFAULT_ROOT = "http://unis.open.sice.indiana.edu:8888"
 
 SCHEMA_CACHE_DIR = os.path.join(PERISCOPE_ROOT, ".rtcache")
+SCHEMA_PACK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schemas")
 SCHEMA_HOST        = 'unis.crest.iu.edu'
 
 _schema = "http://{host}/schema/{directory}/{name}"
@@ -63,6 +64,7 @@ DEFAULT_CONFIG = {
         "preload": [],
         "mode": "exponential",
         "growth": 2,
+        "max_resident": None,
     },
     "proxy": {
         "threads": 10,
@@ -72,7 +74,11 @@ DEFAULT_CONFIG = {
     },
     "measurements": {
         "read_history": True,
-        "subscribe": True
+        "subscribe": True,
+        "history": 0,
+        "rollups": [],
+        "page_size": 10000,
+        "multiplex": False
     }
 }
 
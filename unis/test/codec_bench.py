@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+# =============================================================================
+#  UNIS-RT
+#
+#  Copyright (c) 2012-2016, Trustees of Indiana University,
+#  All rights reserved.
+#
+#  This software may be modified and distributed under the terms of the BSD
+#  license.  See the COPYING file for details.
+#
+#  This software was created at the Indiana University Center for Research in
+#  Extreme Scale Technologies (CREST).
+# =============================================================================
+
+"""
+Per-message cost of the standard library json module against :mod:`unis.utils.codec`.
+
+Usage: ``python -m unis.test.codec_bench [recorded.jsonl]``
+
+The optional argument is a file with one recorded UNIS message per line, such as
+websocket frames or response bodies captured from a data store.  Without it, a set of
+representative subscription frames and collection responses is generated.
+"""
+
+import argparse
+import json
+import timeit
+
+from unis.settings import SCHEMAS
+from unis.utils import codec
+
+def _samples():
+    def _port(i):
+        return {"$schema": SCHEMAS["Port"], "id": "port-{}".format(i), "ts": 1554000000000000 + i,
+                "selfRef": "http://localhost:8888/ports/port-{}".format(i), "name": "eth{}".format(i % 8),
+                "capacity": 10000000000, "address": {"type": "ipv4", "address": "10.0.{}.{}".format(i // 250, i % 250)},
+                "properties": {"mtu": 9000, "vlan": [i % 4096]}}
+    def _node(i):
+        return {"$schema": SCHEMAS["Node"], "id": "node-{}".format(i), "ts": 1554000000000000 + i,
+                "selfRef": "http://localhost:8888/nodes/node-{}".format(i), "name": "switch{:04}".format(i),
+                "ports": [{"rel": "full", "href": "http://localhost:8888/ports/port-{}".format(i * 8 + p)} for p in range(8)]}
+    frames = [{"headers": {"collection": "ports", "action": "PUT"}, "data": _port(i)} for i in range(50)]
+    frames += [{"headers": {"collection": "data/md-{}".format(i), "action": "POST"},
+                "data": {"mid": "md-{}".format(i), "data": [{"ts": 1554000000000000 + t, "value": t * 0.5} for t in range(20)]}}
+               for i in range(50)]
+    return [json.dumps(f).encode('utf-8') for f in frames] + \
+        [json.dumps([_node(i) for i in range(100)]).encode('utf-8'), json.dumps([_port(i) for i in range(500)]).encode('utf-8')]
+
+def _stdlib(msg):
+    return json.dumps(json.loads(str(msg, 'utf-8'))).encode('utf-8')
+def _codec(msg):
+    return codec.dumps(codec.loads(msg))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON codec cost per UNIS message")
+    parser.add_argument('recorded', nargs='?', help="File containing one recorded message per line")
+    parser.add_argument('-n', '--number', type=int, default=200, help="Passes over the message set")
+    args = parser.parse_args()
+
+    if args.recorded:
+        with open(args.recorded, 'rb') as f:
+            msgs = [l.strip() for l in f if l.strip()]
+    else:
+        msgs = _samples()
+
+    print("{} messages, {:.1f} KiB total, codec backend '{}'".format(len(msgs), sum(map(len, msgs)) / 1024, codec.name))
+    results = {}
+    for label, fn in [("json", _stdlib), ("codec", _codec)]:
+        elapsed = min(timeit.repeat(lambda: [fn(m) for m in msgs], number=args.number, repeat=3))
+        results[label] = elapsed / (args.number * len(msgs)) * 1e6
+        print("  {:<6} {:8.2f} us/message (decode + encode)".format(label, results[label]))
+    print("  speedup {:.2f}x".format(results["json"] / results["codec"]))
+
+if __name__ == "__main__":
+    main()
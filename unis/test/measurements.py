@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+
+# =============================================================================
+#  UNIS-RT
+#
+#  Copyright (c) 2012-2016, Trustees of Indiana University,
+#  All rights reserved.
+#
+#  This software may be modified and distributed under the terms of the BSD
+#  license.  See the COPYING file for details.
+#
+#  This software was created at the Indiana University Center for Research in
+#  Extreme Scale Technologies (CREST).
+# =============================================================================
+
+"""
+UNIS measurement related tests
+"""
+
+import asyncio, copy, time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from unis.settings import DEFAULT_CONFIG
+from unis.measurements import DataCollection, DataRouter, DataWriter, Mean
+
+def _runtime(**measurements):
+    rt = MagicMock()
+    rt.settings = copy.deepcopy(DEFAULT_CONFIG)
+    rt.settings['measurements'].update(measurements)
+    return rt
+
+def _metadata(mid="md1"):
+    md = MagicMock()
+    md.id = mid
+    md.getSource.return_value = "cid"
+    return md
+
+class HistoryTest(unittest.TestCase):
+    def test_wrap(self):
+        # Arrange
+        from unis.measurements.history import History
+        history = History(4)
+        
+        # Act
+        [history.append(ts, ts * 10) for ts in range(3)]
+        history.extend([3, 4, 5], [30, 40, 50])
+        
+        # Assert
+        ts, values = history.last(10)
+        self.assertEqual(len(history), 4)
+        self.assertEqual(list(ts), [2, 3, 4, 5])
+        self.assertEqual(list(values), [20, 30, 40, 50])
+        self.assertEqual(list(history.last(2)[1]), [40, 50])
+        self.assertEqual(list(history.between(3, 5)[0]), [3, 4])
+    
+    def test_resample(self):
+        # Arrange
+        from unis.measurements.history import History
+        history = History(16)
+        history.extend(range(10), range(10))
+        
+        # Act
+        starts, means = history.resample(4)
+        _, maxes = history.resample(4, "max", t0=2)
+        
+        # Assert
+        self.assertEqual(list(starts), [0, 4, 8])
+        self.assertEqual(list(means), [1.5, 5.5, 8.5])
+        self.assertEqual(list(maxes), [3, 7, 9])
+        self.assertRaises(ValueError, history.resample, 4, "median")
+    
+    def test_process(self):
+        # Arrange
+        data = DataCollection(_metadata(), _runtime(history=8))
+        
+        # Act
+        [data._process({"ts": ts, "value": str(ts / 2)}) for ts in range(1, 4)]
+        
+        # Assert
+        self.assertEqual(list(data.history.last(3)[1]), [0.5, 1.0, 1.5])
+        self.assertIsNone(DataCollection(_metadata(), _runtime()).history)
+
+class RollupTest(unittest.TestCase):
+    def test_query(self):
+        # Arrange
+        from unis.measurements.rollup import Rollup
+        rollup = Rollup([(10, 2), (1, 100)])
+        rollup.extend(range(0, 30, 2), range(15))
+        
+        # Act
+        starts, means = rollup.query(20, t0=10)
+        _, counts = rollup.query(5, "count", t0=20)
+        
+        # Assert
+        self.assertIs(rollup.tier(20, t0=10), rollup.tiers[1])
+        self.assertIs(rollup.tier(20, t0=0), rollup.tiers[0])
+        self.assertEqual(list(starts), [0, 20])
+        self.assertEqual(list(means), [7, 12])
+        self.assertEqual(list(counts), [3, 2])
+        self.assertRaises(ValueError, Rollup([(10, 2)]).query, 15)
+        self.assertRaises(ValueError, Rollup, [(10, 2), (4, 2)])
+    
+    def test_append(self):
+        # Arrange
+        from unis.measurements.rollup import Rollup
+        batch, single = Rollup([(1, 8), (4, 4)]), Rollup([(1, 8), (4, 4)])
+        ts, values = [5, 1, 6, 2, 9, 2, 11], [3, 8, 1, 4, 7, 6, 2]
+        
+        # Act
+        batch.extend(ts[:3], values[:3])
+        batch.extend(ts[3:], values[3:])
+        [single.append(t, v) for t, v in zip(ts, values)]
+        
+        # Assert
+        for how in Rollup.AGGREGATES:
+            self.assertEqual([list(a) for a in batch.query(4, how)], [list(a) for a in single.query(4, how)])
+        self.assertEqual(list(batch.query(4, "max")[1]), [8, 3, 7])
+        self.assertEqual(list(batch.query(4, "min")[1]), [4, 1, 2])
+    
+    def test_process(self):
+        # Arrange
+        data = DataCollection(_metadata(), _runtime(rollups=[[10, 4]]))
+        
+        # Act
+        data._process_batch([{"ts": ts, "value": ts} for ts in range(20)])
+        data._process({"ts": 25, "value": 5})
+        
+        # Assert
+        self.assertEqual(list(data.rollup.query(10, "sum")[1]), [45, 145, 5])
+        self.assertIsNone(DataCollection(_metadata(), _runtime()).rollup)
+
+class GroupTest(unittest.TestCase):
+    def _group(self, readings, history=16):
+        from unis.measurements.group import DataGroup
+        metadata = []
+        for i, values in enumerate(readings):
+            md = _metadata("md{}".format(i))
+            md.data = DataCollection(md, _runtime(history=history))
+            md.data._subscribe = lambda: True
+            md.data._process_batch([{"ts": ts, "value": v} for ts, v in values])
+            metadata.append(md)
+        metadata.append(MagicMock(data=None))
+        return DataGroup(metadata)
+    
+    def test_aggregate(self):
+        # Arrange
+        group = self._group([[(1, 2), (5, 4), (9, 6)], [], [(2, 10), (6, 20)]])
+        
+        # Act
+        mean, count = group.aggregate("mean", t0=2), group.aggregate("count")
+        each = group.each("max", t1=6)
+        starts, sums = group.resample(4, "sum")
+        
+        # Assert
+        self.assertEqual(len(group), 3)
+        self.assertEqual(mean, 10)
+        self.assertEqual(count, 5)
+        self.assertEqual(each, {"md0": 4, "md2": 10})
+        self.assertEqual(list(starts), [0, 4, 8])
+        self.assertEqual(list(sums), [12, 24, 6])
+        self.assertIsNone(group.aggregate("min", t0=100))
+        self.assertRaises(ValueError, group.aggregate, "median")
+    
+    def test_no_history(self):
+        # Arrange
+        group = self._group([[(1, 2)]], history=0)
+        
+        # Act/Assert
+        self.assertRaises(ValueError, group.aggregate)
+
+class FunctionTest(unittest.TestCase):
+    def _feed(self, fn, values, step=1000000):
+        result = []
+        for i, v in enumerate(values):
+            fn.prior = fn.apply(v, i * step)
+            result.append(fn.postprocess(fn.prior))
+        return result
+    
+    def test_window_count(self):
+        # Arrange
+        from unis.measurements import WindowMean, WindowMin, WindowMax
+        values = [5, 1, 4, 4, 2, 8, 3]
+        
+        # Act
+        means = self._feed(WindowMean(count=3), values)
+        mins = self._feed(WindowMin(count=3), values)
+        maxes = self._feed(WindowMax(count=3), values)
+        
+        # Assert
+        self.assertEqual(means[2:], [10/3, 3, 10/3, 14/3, 13/3])
+        self.assertEqual(mins, [5, 1, 1, 1, 2, 2, 2])
+        self.assertEqual(maxes, [5, 5, 5, 4, 4, 8, 8])
+        self.assertRaises(ValueError, WindowMean)
+    
+    def test_window_duration(self):
+        # Arrange
+        from unis.measurements import WindowMax
+        
+        # Act
+        maxes = self._feed(WindowMax(duration=2.5), [9, 1, 1, 1, 5])
+        
+        # Assert
+        self.assertEqual(maxes, [9, 9, 9, 1, 5])
+    
+    def test_ewma(self):
+        # Arrange
+        from unis.measurements import EWMA
+        
+        # Act
+        fixed = self._feed(EWMA(alpha=0.5), [4, 8, 0])
+        decayed = self._feed(EWMA(halflife=1), [4, 8], step=1000000)
+        fractional = self._feed(EWMA(halflife=1), [4, 8], step=1000000.5)
+        
+        # Assert
+        self.assertEqual(fixed, [4, 6, 3])
+        self.assertEqual(decayed, [4, 6])
+        self.assertEqual(fractional, [4, 6])
+    
+    def test_quantile(self):
+        # Arrange
+        from unis.measurements import Quantile, QuantileSketch
+        data = DataCollection(_metadata(), _runtime())
+        data.attachFunction(Quantile(0.99, name="p99"))
+        data.attachFunction(Quantile(0.5, count=100, name="median"))
+        data.load = lambda: None
+        
+        # Act
+        [data._process({"ts": i, "value": i % 1000 + 1}) for i in range(10000)]
+        other = QuantileSketch().merge(data._fns["p99"].sketch()).merge(data._fns["p99"].sketch())
+        
+        # Assert
+        self.assertAlmostEqual(data.p99, 990, delta=990 * 0.02)
+        self.assertAlmostEqual(data.median, 950, delta=950 * 0.02)
+        self.assertEqual(len(other), 20000)
+        self.assertAlmostEqual(other.quantile(0.5), 500, delta=500 * 0.02)
+    
+    def test_sketch_remove_empty(self):
+        # Arrange
+        from unis.measurements import QuantileSketch
+        sketch = QuantileSketch()
+        sketch.add(5)
+        
+        sketch.add(0)
+        
+        # Act
+        sketch.remove(5)
+        sketch.remove(7)
+        sketch.remove(0, 2)
+        sketch.remove(0)
+        
+        # Assert
+        self.assertEqual(len(sketch), 0)
+        self.assertEqual(sketch.zeros, 0)
+        self.assertEqual(len(sketch._buckets), 0)
+    
+    def test_quantile_bounded(self):
+        # Arrange
+        from unis.measurements import Quantile, QuantileSketch
+        sketch = QuantileSketch(max_buckets=64)
+        fn = Quantile(0.5, duration=10)
+        
+        # Act
+        [sketch.add(1.01 ** i) for i in range(5000)]
+        [fn.apply(i, i * 100000) for i in range(1000)]
+        
+        # Assert
+        self.assertLessEqual(len(sketch._buckets), 64)
+        self.assertAlmostEqual(sketch.quantile(0.99), 1.01 ** 4950, delta=1.01 ** 4950 * 0.02)
+        self.assertLessEqual(len(fn._slices), Quantile.SLICES + 1)
+        self.assertAlmostEqual(fn.postprocess(None), 950, delta=950 * 0.03)
+
+class BatchTest(unittest.TestCase):
+    def test_apply_batch(self):
+        # Arrange
+        import numpy as np
+        from unis.measurements import Function, Last, Min, Max, Mean, Jitter, WindowMean
+        values = [3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0]
+        fns = lambda: [Last(), Min(), Max(), Mean(), Jitter(), WindowMean(count=3), Function(lambda x, p: x + p)]
+        streamed, batched = fns(), fns()
+        
+        # Act
+        for f in streamed:
+            for i, v in enumerate(values):
+                f.prior = f.apply(v, i)
+        for f in batched:
+            for page in (slice(0, 3), slice(3, 8)):
+                f.prior = f.apply_batch(np.array(values[page]), np.arange(len(values))[page])
+        
+        # Assert
+        for s, b in zip(streamed, batched):
+            self.assertAlmostEqual(s.postprocess(s.prior), b.postprocess(b.prior), msg=s.name)
+    
+    def test_process_batch(self):
+        # Arrange
+        md = _metadata()
+        data = DataCollection(md, _runtime(history=4))
+        data.attachFunction(Mean())
+        records = [{"ts": ts, "value": str(ts)} for ts in range(1, 7)]
+        
+        # Act
+        data._process_batch(records)
+        
+        # Assert
+        self.assertEqual(len(data), 6)
+        self.assertEqual(data._at, 6)
+        self.assertEqual(data._fns["mean"].prior, 3.5)
+        self.assertEqual(list(data.history.last(4)[1]), [3, 4, 5, 6])
+        md.getCollection()._serve.assert_called_once()
+
+class LoadTest(unittest.TestCase):
+    def _collection(self, readings, mid="md1"):
+        data = DataCollection(_metadata(mid), _runtime(page_size=3))
+        data._subscribe = lambda: False
+        data.attachFunction(Mean())
+        data.requests = []
+        async def get(src, **kwargs):
+            data.requests.append(kwargs)
+            op, at = kwargs["ts"].split("=")
+            match = [r for r in readings if (r["ts"] > int(at) if op == "gt" else r["ts"] >= int(at))]
+            skip = int(kwargs.get("skip", 0))
+            return match[skip:skip + int(kwargs["limit"])]
+        data._unis.get = get
+        return data
+    
+    def test_paged(self):
+        # Arrange
+        readings = [{"ts": ts, "value": i} for i, ts in enumerate([1, 2, 3, 3, 3, 3, 4, 5])]
+        data = self._collection(readings)
+        progress = []
+        
+        # Act
+        data.load(lambda c, n: progress.append(n))
+        
+        # Assert
+        self.assertEqual(len(data), 8)
+        self.assertEqual(data._fns["mean"].prior, 3.5)
+        self.assertEqual(progress, [3, 6, 8])
+        self.assertEqual([r["ts"] for r in data.requests], ["gt=0", "gte=3", "gte=3"])
+        self.assertEqual([r.get("skip") for r in data.requests], [None, "1", "4"])
+    
+    def test_live_during_load(self):
+        # Arrange
+        readings = [{"ts": ts, "value": 1} for ts in range(1, 8)]
+        data = self._collection(readings)
+        get = data._unis.get
+        async def push(src, **kwargs):
+            if not data.requests:
+                data._process_batch([{"ts": 100, "value": 1}])
+            return await get(src, **kwargs)
+        data._unis.get = push
+        
+        # Act
+        data.load()
+        
+        # Assert
+        self.assertEqual(len(data), 8)
+        self.assertEqual([r["ts"] for r in data.requests], ["gt=0", "gte=3", "gte=6"])
+        self.assertEqual(data._at, 100)
+    
+    def test_live_overlaps_load(self):
+        # Arrange
+        readings = [{"ts": ts, "value": ts} for ts in range(1, 8)]
+        data = self._collection(readings)
+        data._live = []
+        get = data._unis.get
+        async def push(src, **kwargs):
+            if not data.requests:
+                data._receive(readings[4:])
+            return await get(src, **kwargs)
+        data._unis.get = push
+        
+        # Act
+        data.load()
+        
+        # Assert
+        self.assertEqual(len(data), 7)
+        self.assertEqual(data._fns["mean"].prior, 4)
+        self.assertEqual([r["ts"] for r in data.requests], ["gt=0", "gte=3"])
+        self.assertIsNone(data._live)
+    
+    def test_load_many(self):
+        # Arrange
+        readings = [{"ts": ts, "value": ts} for ts in range(1, 8)]
+        collections = [self._collection(readings, "md{}".format(i)) for i in range(4)]
+        
+        # Act
+        DataCollection.load_many(collections)
+        
+        # Assert
+        self.assertEqual([len(c) for c in collections], [7] * 4)
+        self.assertEqual([len(c.requests) for c in collections], [3] * 4)
+
+class WriterTest(unittest.TestCase):
+    @patch('unis.measurements.data.UnisProxy')
+    def test_size(self, proxy):
+        # Arrange
+        writer = DataWriter()
+        
+        # Act
+        writer.submit("cid", "md1", {"ts": 1, "value": 1}, 3)
+        writer.submit("cid", "md2", {"ts": 2, "value": 2}, 3)
+        time.sleep(0.05)
+        pending = proxy.post.call_count
+        writer.submit("cid", "md1", {"ts": 3, "value": 3}, 3)
+        writer.flush()
+        
+        # Assert
+        self.assertEqual(pending, 0)
+        proxy.post.assert_called_once_with({("cid", "data"): [
+            {"mid": "md1", "data": [{"ts": 1, "value": 1}, {"ts": 3, "value": 3}]},
+            {"mid": "md2", "data": [{"ts": 2, "value": 2}]}]})
+    
+    @patch('unis.measurements.data.UnisProxy')
+    def test_delay(self, proxy):
+        # Arrange
+        writer = DataWriter()
+        
+        # Act
+        writer.submit("cid", "md1", {"ts": 1, "value": 1}, 100, 20)
+        writer.submit("cid2", "md2", {"ts": 2, "value": 2}, 100)
+        time.sleep(0.2)
+        
+        # Assert
+        proxy.post.assert_called_once_with({("cid", "data"): [{"mid": "md1", "data": [{"ts": 1, "value": 1}]}]})
+        writer.flush()
+        self.assertEqual(proxy.post.call_count, 2)
+    
+    @patch('unis.measurements.data.UnisProxy')
+    def test_retry(self, proxy):
+        # Arrange
+        writer = DataWriter()
+        writer.RETRY_DELAY = 0.01
+        proxy.post.side_effect = [ConnectionError("down"), None]
+        
+        # Act
+        writer.submit("cid", "md1", {"ts": 1, "value": 1}, 100)
+        writer.submit("cid", "md1", {"ts": 2, "value": 2}, 100)
+        writer.flush()
+        
+        # Assert
+        self.assertEqual(proxy.post.call_count, 2)
+        proxy.post.assert_called_with({("cid", "data"): [
+            {"mid": "md1", "data": [{"ts": 1, "value": 1}, {"ts": 2, "value": 2}]}]})
+    
+    @patch('unis.measurements.data.UnisProxy')
+    def test_retry_exhausted(self, proxy):
+        # Arrange
+        writer = DataWriter()
+        writer.RETRY_DELAY = 0.01
+        proxy.post.side_effect = ConnectionError("down")
+        
+        # Act
+        writer.submit("cid", "md1", {"ts": 1, "value": 1}, 100)
+        
+        # Assert
+        self.assertRaises(ConnectionError, writer.flush)
+        self.assertEqual(proxy.post.call_count, DataWriter.RETRIES + 1)
+        writer.flush()
+    
+    @patch('unis.measurements.data.DataWriter')
+    def test_append(self, writer):
+        # Arrange
+        data = DataCollection(_metadata(), _runtime(batch_size=10, batch_until=5))
+        
+        # Act
+        data.append(7, 100)
+        
+        # Assert
+        writer.get().submit.assert_called_once_with("cid", "md1", {"ts": 100, "value": 7}, 10, 5)
+
+class RouterTest(unittest.TestCase):
+    @patch('unis.measurements.data.asynchronous')
+    def test_follow(self, asynchronous):
+        # Arrange
+        router = DataRouter()
+        collections = [DataCollection(_metadata("md{}".format(i)), _runtime()) for i in range(3)]
+        
+        # Act
+        [router.follow(c) for c in collections]
+        cb = asynchronous.make_async.call_args[0][2]
+        cb({"md0": [{"ts": 1, "value": 2}, {"ts": 2, "value": 4}], "md2": [{"ts": 1, "value": 6}], "md9": [{"ts": 1, "value": 0}]}, "POST")
+        router.unfollow(DataCollection(_metadata("md0"), _runtime()))
+        router.unfollow(collections[2])
+        cb({"mid": "md2", "data": [{"ts": 2, "value": 8}]}, "POST")
+        cb({"mid": "md0", "data": [{"ts": 3, "value": 8}]}, "POST")
+        
+        # Assert
+        asynchronous.make_async.assert_called_once_with(router._unis.subscribe, ["cid"], cb)
+        self.assertEqual([len(c) for c in collections], [3, 0, 1])
+        self.assertEqual(collections[0]._md.getCollection()._serve.call_count, 2)
+    
+    @patch('unis.measurements.data.DataRouter')
+    def test_subscribe(self, router):
+        # Arrange
+        data = DataCollection(_metadata(), _runtime(multiplex=True))
+        
+        # Act
+        first, second = data._subscribe(), data._subscribe()
+        
+        # Assert
+        router.get().follow.assert_called_once_with(data)
+        self.assertEqual((first, second), (False, True))
+    
+    @patch('unis.measurements.data.asynchronous')
+    @patch('unis.measurements.data.DataRouter')
+    def test_subscribe_measurement(self, router, asynchronous):
+        # Arrange
+        data = DataCollection(_metadata(), _runtime())
+        
+        # Act
+        first, second = data._subscribe(), data._subscribe()
+        cb = asynchronous.make_async.call_args[0][2]
+        cb({"md1": [{"ts": 1, "value": 2}, {"ts": 2, "value": 4}]}, "POST")
+        
+        # Assert
+        router.get().follow.assert_not_called()
+        asynchronous.make_async.assert_called_once_with(data._unis.subscribe, ["cid"], cb)
+        self.assertEqual((first, second), (False, True))
+        self.assertEqual(len(data), 0)
+        
+        # Act
+        async def get(src, **kwargs):
+            return []
+        data._unis.get = get
+        asyncio.run(data._load_pages())
+        cb({"md1": [{"ts": 3, "value": 6}]}, "POST")
+        
+        # Assert
+        self.assertEqual(len(data), 3)
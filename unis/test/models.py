@@ -24,9 +24,10 @@ import unittest.mock as mock
 from unittest.mock import MagicMock, Mock
 
 from unis.settings import SCHEMAS, DEFAULT_CONFIG
-from unis.models import Node, Exnode, Extent, schemaLoader
-from unis.models.models import _CACHE, UnisObject, List, Local, _schemaFactory, Context
+from unis.models import Node, Exnode, Extent, NetworkResource, schemaLoader
+from unis.models.models import _CACHE, _SchemaStore, UnisObject, List, Local, _schemaFactory, Context, Serializer
 from unis.models.lists import UnisCollection
+from unis.exceptions import CollectionIndexError
 
 _emptyschema = { 'name': 'blank', 'id': 'blank_schema' }
 EmptyObject = _schemaFactory(_emptyschema, 'EmptyObject', [type(UnisObject)])('EmptyObject', tuple([UnisObject]), {})
@@ -111,7 +112,99 @@ class UnisObjectTest(unittest.TestCase):
         self.assertIsInstance(v.getObject(), Local)
         self.assertTrue(hasattr(v, "a"))
         self.assertEqual(v.a, "1")
+    
+    def test_serializer(self):
+        # Arrange
+        import json
+        obj1 = EmptyObject({"a": 1, "v": { "b": ["1", "2"] }, "ts": 10})
+        obj1.extendSchema("c", 5)
+        
+        # Act
+        result = Serializer().encode(obj1)
+        partial = Serializer(exclude=['ts']).dumps([obj1, obj1])
+        
+        # Assert
+        self.assertIsInstance(result, bytes)
+        self.assertEqual(json.loads(result), obj1.to_JSON())
+        self.assertEqual(json.loads(partial), [{k:v for k,v in obj1.to_JSON().items() if k != 'ts'}] * 2)
+    
+    def test_serializer_modified(self):
+        # Arrange
+        import json
+        obj1 = EmptyObject({"a": 1, "v": { "b": ["1", "2"] }})
+        serializer = Serializer()
+        serializer.encode(obj1)
+        
+        # Act
+        obj1.a = 2
+        obj1.v.b.append("3")
+        obj1.v.c = "4"
+        
+        # Assert
+        self.assertEqual(json.loads(serializer.encode(obj1)), obj1.to_JSON())
+        self.assertEqual(json.loads(serializer.encode(obj1))['v'], {"b": ["1", "2", "3"], "c": "4"})
+
+    def test_serializer_schema_once(self):
+        # Arrange
+        obj1 = EmptyObject({"a": 1})
+        obj2 = EmptyObject({"$schema": obj1.getObject()._rt_schema['id'], "a": 1})
+        
+        # Act
+        result = Serializer().encode(obj2)
+        obj1.getObject()._release()
+        released = Serializer().encode(obj1)
+        
+        # Assert
+        self.assertEqual(result.count(b'"$schema"'), 1)
+        self.assertEqual(released.count(b'"$schema"'), 1)
+
+    def test_scalar_unwrapped(self):
+        # Arrange
+        obj1 = EmptyObject({"a": 1, "v": { "b": ["1", "2"] }})
+
+        # Act
+        a, b = obj1.a, list(obj1.v.b)
+
+        # Assert
+        self.assertEqual(a, 1)
+        self.assertEqual(b, ["1", "2"])
+        self.assertIs(obj1.getObject().__dict__['a'], 1)
+        self.assertEqual(obj1.v.b.getObject()._rt_ls, ["1", "2"])
+
+    def test_merge_containers(self):
+        # Arrange
+        obj1 = EmptyObject({"id": "1", "ts": 1, "v": ["1"], "d": { "a": "1" }})
+        vs, d = obj1.v.getObject(), obj1.d.getObject()
+        obj2 = EmptyObject({"id": "1", "ts": 2, "v": ["2", "3"], "d": { "a": "2" }})
         
+        # Act
+        merged = obj1.getObject().merge(obj2.getObject(), obj1)
+        obj1.v.append("4")
+        
+        # Assert
+        self.assertTrue(merged)
+        self.assertIs(obj1.getObject().__dict__['v'], vs)
+        self.assertIs(obj1.getObject().__dict__['d'], d)
+        self.assertEqual(list(obj1.v), ["2", "3", "4"])
+        self.assertEqual(obj1.d.a, "2")
+
+    def test_list_batch_resolve(self):
+        # Arrange
+        targets = [EmptyObject({"id": str(i)}).getObject() for i in range(3)]
+        hrefs = ["http://localhost:8888/ports/{}".format(i) for i in range(3)]
+        rt = MagicMock()
+        rt.find_many.return_value = targets
+        obj1 = EmptyObject({"v": [{"href": h, "rel": "full"} for h in hrefs]})
+        obj1.setRuntime(rt)
+
+        # Act
+        values = list(obj1.v)
+
+        # Assert
+        rt.find_many.assert_called_once_with(hrefs)
+        rt.find.assert_not_called()
+        self.assertEqual([v.getObject() for v in values], targets)
+
 class NetworkResourceTest(unittest.TestCase):
 
     VALID_NODE = {
@@ -137,6 +230,15 @@ class NetworkResourceTest(unittest.TestCase):
         self.assertEqual(getattr(node1, '$schema'), SCHEMAS['Node'])
         self.assertEqual(getattr(node2, '$schema'), SCHEMAS['Node'])
         
+    def test_instancecheck(self):
+        node = Node(NetworkResourceTest.VALID_NODE)
+        resource = NetworkResource()
+        
+        self.assertIsInstance(node, NetworkResource)
+        self.assertIsInstance(node.getObject(), Node)
+        self.assertNotIsInstance(resource, Node)
+        self.assertNotIsInstance(node.ports, Node)
+    
     def test_validate(self):
         from jsonschema.exceptions import ValidationError
         
@@ -165,6 +267,7 @@ class NetworkResourceTest(unittest.TestCase):
 class CollectionTest(unittest.TestCase):
     def setUp(self):
         UnisCollection.collections = {}
+        UnisCollection.namespaces.clear()
         
     def runtime(self):
         rt = MagicMock()
@@ -213,6 +316,230 @@ class CollectionTest(unittest.TestCase):
         self.assertEqual(col._indices['id'].index('1'), 0)
         self.assertEqual(col[0].v, 2)
         
+    def test_append_evict(self):
+        # Arrange
+        rt = self.runtime()
+        rt.settings['cache'] = {**rt.settings['cache'], 'max_resident': 2}
+        col = UnisCollection.get_collection("", Node, rt)
+        nodes = [Node({"id": str(i), "v": i}).getObject() for i in range(3)]
+        for n in nodes: n._rt_source = "cid"
+        col.createIndex("v")
+
+        # Act
+        [col.append(n) for n in nodes]
+
+        # Assert
+        self.assertEqual(col._stubs["0"], "cid")
+        self.assertEqual(len(col), 3)
+        self.assertEqual(col._indices['id'].index('2'), 2)
+        self.assertEqual(col._indices['v'].index(0), set())
+        self.assertRaises(CollectionIndexError, col._indices['id'].index, '0')
+
+        # Act
+        fetch = col._obj._get_next = Mock()
+        result = col.get(["http://localhost/nodes/0"])
+
+        # Assert
+        fetch.assert_not_called()
+        self.assertIs(result[0], nodes[0])
+        self.assertEqual(nodes[0].to_JSON()["v"], 0)
+        self.assertEqual(col._stubs["1"], "cid")
+
+        # Act
+        refetched = Node({"id": "2", "v": 2}).getObject()
+        refetched._rt_source = "cid"
+        col._obj._evict("2", nodes[2])
+        col._obj._evicted["2"] = lambda: None
+        fetch.side_effect = lambda ids: col.append(refetched)
+        result = col.get(["http://localhost/nodes/2"])
+
+        # Assert
+        fetch.assert_called_once_with([("2", "cid")])
+        self.assertIs(result[0], refetched)
+
+    def test_update_evicted(self):
+        # Arrange
+        rt = self.runtime()
+        rt.settings['cache'] = {**rt.settings['cache'], 'max_resident': 2}
+        col = UnisCollection.get_collection("", Node, rt)
+        nodes = [Node({"id": str(i), "v": i}).getObject() for i in range(3)]
+        for n in nodes: n._rt_source = "cid"
+        col.createIndex("v")
+        [col.append(n) for n in nodes]
+        
+        # Act
+        nodes[0].__dict__['v'] = 5
+        col.updateIndex(nodes[0])
+        
+        # Assert
+        self.assertIs(col._stubs["0"], nodes[0])
+        self.assertIs(col._obj._cache[col._indices['id'].index('0')], nodes[0])
+        self.assertEqual(col._indices['v'].index(5), {col._indices['id'].index('0')})
+    
+    def test_scan_evict(self):
+        # Arrange
+        rt = self.runtime()
+        rt.settings['cache'] = {**rt.settings['cache'], 'max_resident': 2}
+        col = UnisCollection.get_collection("", Node, rt)
+        nodes = [Node({"id": str(i), "v": i}).getObject() for i in range(5)]
+        for n in nodes: n._rt_source = "cid"
+        col._obj._complete_cache = lambda: [col.append(n) for n in nodes]
+        
+        # Act
+        loaded = col.load()
+        scanned = list(col.where(lambda x: True))
+        
+        # Assert
+        self.assertEqual(len(loaded), 5)
+        self.assertEqual(len(scanned), 5)
+        self.assertEqual(col.stats.loaded, 2)
+        self.assertEqual(nodes[0].to_JSON()["v"], 0)
+
+    def test_remove_compact(self):
+        # Arrange
+        rt = self.runtime()
+        col = UnisCollection.get_collection("", Node, rt)
+        col._obj._cache.MIN_COMPACT = 2
+        nodes = [Node({"id": str(i)}).getObject() for i in range(6)]
+        [col.append(n) for n in nodes]
+        
+        # Act
+        [col._obj._remove_record(n) for n in nodes[:4]]
+        col.append(Node({"id": "6"}).getObject())
+        
+        # Assert
+        self.assertEqual(len(col._cache), 3)
+        self.assertEqual(col._cache.full_length(), 3)
+        self.assertEqual([n.id for n in col], ["4", "5", "6"])
+        self.assertEqual([col._indices['id'].index(str(i)) for i in range(4, 7)], [0, 1, 2])
+    
+    def test_append_during_compact(self):
+        # Arrange
+        rt = self.runtime()
+        col = UnisCollection.get_collection("", Node, rt)
+        col._obj._cache.MIN_COMPACT = 1
+        col.createIndex("v")
+        nodes = [Node({"id": str(i), "v": i}).getObject() for i in range(3)]
+        [col.append(n) for n in nodes]
+        merge = nodes[2].merge
+        def _merge(other, ctx):
+            [col._obj._remove_record(n) for n in nodes[:2]]
+            return merge(other, ctx)
+        nodes[2].__dict__['merge'] = _merge
+        
+        # Act
+        result = col.append(Node({"id": "2", "v": 5}).getObject())
+        
+        # Assert
+        self.assertIs(result, nodes[2])
+        self.assertEqual(col._indices['id'].index("2"), 0)
+        self.assertEqual(col._indices['v'].index(5), {0})
+        self.assertEqual(col._indices['v'].index(2), set())
+    
+    def test_remove_many(self):
+        # Arrange
+        rt = self.runtime()
+        col = UnisCollection.get_collection("", Node, rt)
+        nodes = [Node({"id": str(i)}).getObject() for i in range(4)]
+        [col.append(n) for n in nodes]
+        nodes[1]._rt_source = nodes[2]._rt_source = "cid"
+        col._obj._unis = Mock()
+        col._obj._unis.delete_many.return_value = [True, False]
+        events = []
+        col.addCallback(lambda res, ty: events.append((res.id, ty)))
+
+        # Act
+        col.remove_many(nodes[:3])
+
+        # Assert
+        col._obj._unis.delete_many.assert_called_once_with([("cid", "1"), ("cid", "2")], 10)
+        self.assertEqual([n.id for n in col], ["1", "3"])
+        self.assertEqual(sorted(events), [("0", "delete"), ("2", "delete")])
+        self.assertEqual(col.stats.deleted, 2)
+
+    def test_where_snapshot(self):
+        # Arrange
+        import threading
+        rt = self.runtime()
+        col = UnisCollection.get_collection("", Node, rt)
+        nodes = [Node({"id": str(i)}).getObject() for i in range(3)]
+        [col.append(n) for n in nodes]
+        free = []
+        def pred(n):
+            t = threading.Thread(target=lambda: free.append(col._obj._lock.acquire(timeout=1) and col._obj._lock.release() is None))
+            t.start(), t.join()
+            return True
+        
+        # Act
+        scan = col.where(pred)
+        first = next(scan)
+        col._obj._remove_record(nodes[1])
+        col.append(Node({"id": "3"}).getObject())
+        rest = list(scan)
+        
+        # Assert
+        self.assertEqual([first.id] + [n.id for n in rest], ["0", "1", "2"])
+        self.assertEqual(free, [True] * 3)
+        self.assertEqual(sorted(n.id for n in col), ["0", "2", "3"])
+        self.assertEqual(col._cache._readers, 0)
+
+    def test_stats(self):
+        # Arrange
+        rt = self.runtime()
+        col = UnisCollection.get_collection("", Node, rt)
+        col._obj._set_stub("2", "cid")
+        col._obj._set_stub("3", "cid")
+        n1 = Node({"id": "1"}).getObject()
+        
+        # Act
+        col.append(n1)
+        col.append(Node({"id": "2"}).getObject())
+        col._obj._remove_record(n1)
+        
+        # Assert
+        self.assertEqual(len(col), 2)
+        self.assertEqual(tuple(col.stats), (1, 1, 1))
+    
+    def test_from_name_namespace(self):
+        # Arrange
+        from unis.runtime.oal import ObjectLayer
+        rt, other = self.runtime(), self.runtime()
+        other.settings = {**other.settings, "namespace": "ut2"}
+        UnisCollection.get_collection("nodes", Node, rt)
+        UnisCollection.get_collection("resources", NetworkResource, rt)
+        UnisCollection.get_collection("exnodes", Exnode, other)
+        oal = ObjectLayer(rt.settings)
+        
+        # Act
+        names = [c.name for c in UnisCollection.from_name(None, rt)]
+        
+        # Assert
+        self.assertEqual(names, ["nodes", "resources"])
+        self.assertEqual(oal.getModel(Node.names), "nodes")
+        self.assertEqual(oal.getModel(NetworkResource.names), "resources")
+        self.assertRaises(ValueError, oal.getModel, ["Exnode"])
+    
+    def test_append_many(self):
+        # Arrange
+        rt = self.runtime()
+        col = UnisCollection.get_collection("", Node, rt)
+        col.createIndex("v")
+        col.append(Node({"id": "0", "v": 0}).getObject())
+        events = []
+        col.addCallback(lambda res, ty: events.append((res.id, ty)))
+        nodes = [Node({"id": str(i), "v": i % 2}).getObject() for i in range(1, 4)]
+        
+        # Act
+        result = col.append_many(nodes + [Node({"id": "1", "v": 5}).getObject()])
+        
+        # Assert
+        self.assertEqual(len(col), 4)
+        self.assertIs(result[3], nodes[0])
+        self.assertEqual(nodes[0].__dict__['v'], 5)
+        self.assertEqual(events, [("1", "new"), ("2", "new"), ("3", "new")])
+        self.assertEqual(col._indices['id'].index('3'), 3)
+        self.assertEqual(col._indices['v'].index(0), set([0, 2]))
+    
     def test_append_bad(self):
         # Arrange
         rt = self.runtime()
@@ -221,6 +548,29 @@ class CollectionTest(unittest.TestCase):
         
         # Assert
         self.assertRaises(TypeError, col.append, e1.getObject())
+    
+    def test_load_include(self):
+        # Arrange
+        from unis.models import Port, Link
+        rt = self.runtime()
+        col = UnisCollection.get_collection("", Node, rt)
+        ports = [Port({"id": str(i), "link": {"href": "http://localhost/links/{}".format(i)}}) for i in range(3)]
+        links = [Link({"id": str(i)}) for i in range(3)]
+        refs = {"http://localhost/ports/{}".format(i): p.getObject() for i,p in enumerate(ports)}
+        refs.update({"http://localhost/links/{}".format(i): l.getObject() for i,l in enumerate(links)})
+        rt.find_many.side_effect = lambda hrefs: [refs.get(h, None) for h in hrefs]
+        col.append(Node({"id": "1", "ports": [{"href": "http://localhost/ports/0"}, {"href": "http://localhost/ports/1"}]}).getObject())
+        col.append(Node({"id": "2", "ports": [{"href": "http://localhost/ports/2"}]}).getObject())
+        
+        # Act
+        nodes = col.load(include=["ports", "ports.link"])
+        
+        # Assert
+        self.assertEqual(rt.find_many.call_count, 2)
+        self.assertEqual(len(rt.find_many.call_args_list[0][0][0]), 3)
+        self.assertEqual(nodes[0].ports[1].getObject(), ports[1].getObject())
+        self.assertEqual(nodes[1].ports[0].link.getObject(), links[2].getObject())
+        rt.find.assert_not_called()
         
     def test_setitem(self):
         # Arrange
@@ -332,6 +682,25 @@ class CollectionTest(unittest.TestCase):
         self.assertEqual(col._indices['v'].index(5), {1})
         self.assertEqual(col._indices['v'].index(10), {0})
 
+    def test_update_index_unchanged(self):
+        # Arrange
+        rt = self.runtime()
+        col = UnisCollection.get_collection("", Node, rt)
+        col.createIndex("v")
+        col.createIndex("w")
+        col.append(Node({"id": "1", "v": 1, "w": 1}).getObject())
+        col._indices['w'] = index = Mock(wraps=col._indices['w'])
+        
+        # Act
+        n = col[0]
+        n.getObject().__dict__['v'] = None
+        col.updateIndex(n)
+        
+        # Assert
+        index.remove.assert_not_called()
+        self.assertEqual(col._indices['v'].index(1), set())
+        self.assertEqual(index.index(1), {0})
+
     def test_where_single_pre_init(self):
         # Arrange
         rt = self.runtime()
@@ -466,3 +835,60 @@ class CollectionTest(unittest.TestCase):
         self.assertEqual(len(n), 1)
         self.assertIn(n[0], nodes)
         self.assertEqual(n[0].v, 2)
+
+class SchemaStoreTest(unittest.TestCase):
+    def test_pack_and_cache(self):
+        # Arrange
+        import json, os, tempfile
+        pack, cache = tempfile.mkdtemp(), tempfile.mkdtemp()
+        with open(os.path.join(pack, 'index.json'), 'w') as f:
+            json.dump({'version': 2, 'schemas': {'http://a/packed#': 'packed', 'http://a/both#': 'packed'}}, f)
+        with open(os.path.join(pack, 'packed'), 'w') as f:
+            json.dump({'id': 'http://a/packed#', 'name': 'packed'}, f)
+        with open(os.path.join(cache, 'http:acached#'), 'w') as f:
+            json.dump({'id': 'http://a/cached#', 'name': 'cached'}, f)
+        with open(os.path.join(cache, 'http:aboth#'), 'w') as f:
+            json.dump({'id': 'http://a/both#', 'name': 'fresh'}, f)
+        store = _SchemaStore(pack, cache)
+        
+        # Act
+        with mock.patch('unis.models.models.requests.get') as get:
+            packed, cached, nofrag = store['http://a/packed#'], store['http://a/cached#'], store['http://a/packed']
+            both = store['http://a/both#']
+        
+        # Assert
+        get.assert_not_called()
+        self.assertEqual(store.version, 2)
+        self.assertEqual(packed['name'], 'packed')
+        self.assertEqual(cached['name'], 'cached')
+        self.assertEqual(both['name'], 'fresh')
+        self.assertIs(nofrag, packed)
+    
+    def test_bundled_pack(self):
+        # Arrange
+        import tempfile
+        from unis.settings import SCHEMA_PACK_DIR
+        store = _SchemaStore(SCHEMA_PACK_DIR, tempfile.mkdtemp())
+        
+        # Act
+        with mock.patch('unis.models.models.requests.get') as get:
+            schemas = {k: store[v] for k,v in SCHEMAS.items()}
+            refs = [store[p['$ref']] for s in schemas.values() for p in s.get('allOf', [])]
+        
+        # Assert
+        get.assert_not_called()
+        self.assertEqual({k: s['id'] for k,s in schemas.items()}, SCHEMAS)
+        self.assertTrue(refs)
+    
+    def test_lazy_models(self):
+        # Arrange
+        import unis.models
+        
+        # Act
+        cls = unis.models.Port
+        
+        # Assert
+        self.assertIs(cls, schemaLoader.get_class(SCHEMAS['Port']))
+        self.assertIn('Port', dir(unis.models))
+        with self.assertRaises(AttributeError):
+            unis.models.NotAModel
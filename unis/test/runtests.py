@@ -27,11 +27,23 @@ UNIT_TEST_MODULES = [
     'unis.test.models.UnisObjectTest',
     'unis.test.models.NetworkResourceTest',
     'unis.test.models.CollectionTest',
+    'unis.test.models.SchemaStoreTest',
+    'unis.test.runtime.ReplicaTest',
+    'unis.test.runtime.GraphTest',
     #'unis.test.services.RuntimeServiceTest',
     #'unis.test.runtime.OALTest',
     #'unis.test.runtime.RuntimeTest',
     'unis.test.utils.IndexTest',
-    'unis.test.utils.UniqueIndexTest'
+    'unis.test.utils.UniqueIndexTest',
+    'unis.test.utils.CodecTest',
+    'unis.test.measurements.HistoryTest',
+    'unis.test.measurements.RollupTest',
+    'unis.test.measurements.GroupTest',
+    'unis.test.measurements.FunctionTest',
+    'unis.test.measurements.BatchTest',
+    'unis.test.measurements.LoadTest',
+    'unis.test.measurements.WriterTest',
+    'unis.test.measurements.RouterTest'
 ]
 
 INTEGRATION_TEST_MODULES = []
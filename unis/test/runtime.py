@@ -186,3 +186,137 @@ class OALTest(unittest.TestCase):
         a_mock.called_once_with(n)
         p_mock.assert_called_with([n])
         ui_mock.assert_called_with(n)
+
+class ReplicaTest(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        from unis.models.lists import UnisCollection
+        from unis.settings import DEFAULT_CONFIG
+        UnisCollection.collections = {}
+        UnisCollection.namespaces.clear()
+        self.rt = MagicMock()
+        self.rt.settings = { "namespace": "ut", **DEFAULT_CONFIG }
+        self.col = UnisCollection.get_collection("nodes", Node, self.rt)
+        self.col.createIndex("name")
+        self.path = tempfile.mktemp()
+        
+    def tearDown(self):
+        import os
+        try: os.remove(self.path)
+        except OSError: pass
+    
+    def test_publish_read(self):
+        # Arrange
+        from unis.runtime.replica import ReplicaPublisher, ReplicaReader
+        [self.col.append(Node({"id": str(i), "name": "n{}".format(i % 2)}).getObject()) for i in range(4)]
+        publisher = ReplicaPublisher(self.path)
+        publisher.setRuntime(self.rt)
+        publisher.attach(self.col)
+        
+        # Act
+        publisher.publish()
+        replica = ReplicaReader(self.path)
+        nodes = replica["nodes"]
+        
+        # Assert
+        self.assertEqual(replica.collections, ["nodes"])
+        self.assertEqual(len(nodes), 4)
+        self.assertEqual(nodes["2"].name, "n0")
+        self.assertEqual(sorted(n.id for n in nodes.where({"name": "n1"})), ["1", "3"])
+        self.assertEqual([n.id for n in nodes.where(lambda n: n.id == "0")], ["0"])
+        self.assertFalse(replica.refresh())
+        
+        # Act
+        self.col.append(Node({"id": "4", "name": "n0"}).getObject())
+        publisher.publish()
+        
+        # Assert
+        self.assertTrue(replica.refresh())
+        self.assertEqual(replica.generation, 2)
+        self.assertEqual(len(replica.nodes), 5)
+        self.assertEqual(len(nodes), 4)
+        
+        # Act
+        buf = replica._buf
+        replica.close()
+        
+        # Assert
+        self.assertTrue(buf.closed)
+        self.assertEqual(replica.collections, [])
+        self.assertTrue(replica.refresh())
+        self.assertEqual(len(replica.nodes), 5)
+
+    def test_shutdown(self):
+        # Arrange
+        from unis.runtime.replica import ReplicaPublisher
+        publisher = ReplicaPublisher(self.path, interval=60)
+        publisher.setRuntime(self.rt)
+        publisher.initialize()
+        publisher.attach(self.col)
+        
+        # Act
+        publisher.shutdown()
+        
+        # Assert
+        self.assertFalse(publisher._thread.is_alive())
+        self.assertEqual(publisher.generation, 0)
+
+class GraphTest(unittest.TestCase):
+    def test_adjacency(self):
+        # Arrange
+        from unis.models import Link
+        from unis.services.graphbuilder import Graph
+        nodes = [Node({"id": str(i), "name": "n{}".format(i), "ports": []}) for i in range(3)]
+        link = Link({"id": "l0", "directed": True})
+        g = Graph(nodes[:2], [(nodes[0], nodes[1], link)], db=MagicMock())
+        
+        # Act
+        added = g.addVertex(Node({"id": "0"})), g.addEdge(nodes[0], nodes[1], link)
+        g.createEdge(nodes[1], nodes[2])
+        
+        # Assert
+        self.assertEqual(added, (False, False))
+        self.assertEqual(len(g.vertices), 3)
+        self.assertIn(nodes[2], g)
+        self.assertIs(g.getVertex("2"), nodes[2])
+        self.assertTrue(g.hasEdge(nodes[0], nodes[1], link))
+        self.assertFalse(g.hasEdge(nodes[1], nodes[0]))
+        self.assertIs(g.getEdge(nodes[1], nodes[0]), link)
+        self.assertIsNone(g.getEdge(nodes[1], nodes[0], directed=True))
+        self.assertIs(g.getEdge(nodes[2], nodes[1], directed=True), g.getEdge(nodes[1], nodes[2]))
+        self.assertEqual(sorted(n.id for n, _ in g.neighbors(nodes[1])), ["2"])
+        self.assertEqual(len(g.edges), 3)
+    
+    def test_parallel_links(self):
+        # Arrange
+        from unis.models import Link
+        from unis.services.graphbuilder import Graph
+        nodes = [Node({"id": str(i), "name": "n{}".format(i), "ports": []}) for i in range(2)]
+        links = [Link({"id": "l{}".format(i), "directed": True}) for i in range(2)]
+        g = Graph(db=MagicMock())
+        
+        # Act
+        added = [g.addEdge(nodes[0], nodes[1], l) for l in links + links[:1]]
+        
+        # Assert
+        self.assertEqual(added, [True, True, False])
+        self.assertTrue(g.hasEdge(nodes[0], nodes[1], links[1]))
+        self.assertIs(g.getEdge(nodes[0], nodes[1]), links[0])
+        self.assertEqual([l.id for _, l in g.neighbors(nodes[0])], ["l0", "l1"])
+        self.assertEqual(len(g.edges), 2)
+    
+    def test_build_graph(self):
+        # Arrange
+        from unis.services.graphbuilder import Graph
+        g = Graph(db=MagicMock())
+        
+        # Act
+        vertices = [g.createVertex() for _ in range(3)]
+        built = Graph.build_graph(10, 2, db=MagicMock())
+        
+        # Assert
+        self.assertEqual(len(g.vertices), 3)
+        self.assertTrue(all(v in g for v in vertices))
+        self.assertEqual(len(built.vertices), 10)
+        self.assertEqual(len(built.edges), 90)
+        self.assertTrue(all(built.hasEdge(a, b, l) for a, b, l in built.edges))
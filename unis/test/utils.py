@@ -113,6 +113,45 @@ class IndexTest(unittest.TestCase):
 
         self.assertEqual(index.index('d'), set([5]))
 
+    def test_update_unchanged(self):
+        index = self._basic_index() # 0=a, 1=b, 2=c
+        index.update(3, 'a')
+        block = index._blocks['a']
+
+        index.update(0, 'a')
+
+        self.assertIs(index._blocks['a'], block)
+        self.assertEqual(list(block._ls), [0, 3])
+        self.assertEqual(index.subset('le', 'a'), set([0, 3]))
+
+    def test_update_many(self):
+        index = self._basic_index() # 0=a, 1=b, 2=c
+
+        index.update_many([(0, 'c'), (3, 'a'), (4, 'c')])
+
+        self.assertEqual(index.index('a'), set([3]))
+        self.assertEqual(index.index('c'), set([0, 2, 4]))
+        self.assertEqual(index.subset('gt', 'a'), set([0, 1, 2, 4]))
+
+    def test_update_many_repeated(self):
+        index = self._basic_index() # 0=a, 1=b, 2=c
+
+        index.update_many([(3, 'a'), (3, 'b'), (0, 'b'), (0, 'c')])
+
+        self.assertEqual(index.index('a'), set())
+        self.assertEqual(index.index('b'), set([1, 3]))
+        self.assertEqual(index.index('c'), set([0, 2]))
+
+    def test_remap(self):
+        index = self._basic_index() # 0=a, 1=b, 2=c
+        index.remove(1)
+
+        index.remap({0: 0, 2: 1})
+
+        self.assertEqual(index.index('c'), set([1]))
+        self.assertEqual(index.subset('ge', 'a'), set([0, 1]))
+        self.assertRaises(CollectionIndexError, index.remove, 2)
+
 class UniqueIndexTest(unittest.TestCase): 
     def _basic_index(self):
         index = UniqueIndex('test')
@@ -153,5 +192,55 @@ class UniqueIndexTest(unittest.TestCase):
         index = self._basic_index()
 
         self.assertRaises(CollectionIndexError, index.update, 2, 'a')
+
+    def test_update_changed(self):
+        index = self._basic_index()
+
+        index.update(0, 'd')
+
+        self.assertEqual(index.index('d'), 0)
+        self.assertRaises(CollectionIndexError, index.index, 'a')
+        index.update(1, 'a')
+        self.assertEqual(index.index('a'), 1)
         
     
+
+    def test_remap(self):
+        index = self._basic_index()
+        index.remove(1)
+
+        index.remap({0: 0, 2: 1})
+
+        self.assertEqual(index.index('a'), 0)
+        self.assertEqual(index.index('c'), 1)
+        self.assertRaises(CollectionIndexError, index.index, 'b')
+
+class CodecTest(unittest.TestCase):
+    def test_round_trip(self):
+        from unis.utils import codec
+        doc = {"id": "1", "name": "né", "v": [1, 2.5, None, True], "href": "http://localhost/nodes/1"}
+
+        encoded = codec.dumps(doc)
+
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(codec.loads(encoded), doc)
+        self.assertEqual(codec.loads(encoded.decode('utf-8')), doc)
+        self.assertRaises(codec.DecodeError, codec.loads, b"")
+
+    def test_non_finite(self):
+        import importlib, sys
+        from unittest import mock
+        from unis.utils import codec
+        doc = {"v": [float('nan'), float('inf'), -float('inf'), 1.5], "w": {"x": float('nan')}}
+        expected = {"v": [None, None, None, 1.5], "w": {"x": None}}
+
+        results = {codec.name: codec.loads(codec.dumps(doc))}
+        try:
+            with mock.patch.dict(sys.modules, {"orjson": None, "ujson": None}):
+                importlib.reload(codec)
+                results[codec.name] = codec.loads(codec.dumps(doc))
+        finally:
+            importlib.reload(codec)
+
+        self.assertIn("json", results)
+        self.assertEqual(list(results.values()), [expected] * len(results))
@@ -9,12 +9,14 @@ from unis.exceptions import CollectionIndexError
 @trace("unis.utils")
 class _keyblock(object):
     def __init__(self):
-        self._ls, self._next, self._prev = [], [], []
+        self._ls, self._next, self._prev = {}, [], []
 
     def append(self, v):
-        self._ls.append(v)
+        self._ls[v] = None
+    def extend(self, vs):
+        self._ls.update(dict.fromkeys(vs))
     def remove(self, v):
-        self._ls.remove(v)
+        del self._ls[v]
     def __contains__(self, v):
         return v in self._ls
     def __iter__(self):
@@ -91,15 +93,35 @@ class Index(object):
         :param any value: Value of the field in the resource.
         
         Takes a given index and associates it with a specified value in the
-        :class:`Index <unis.utils.Index>`.
+        :class:`Index <unis.utils.Index>`.  Positions already associated with
+        `value` are left untouched.
         """
-        try:
+        if index in self._reverse:
+            if self._reverse[index] == value:
+                return
             self.remove(index)
-        except CollectionIndexError:
-            pass
         block = self._get_block(value)
         block.append(index)
         self._reverse[index] = value
+    def update_many(self, pairs):
+        """
+        :param pairs: Position and value pairs to associate.
+        :type pairs: list[tuple(int, any)]
+        
+        As :meth:`Index.update <unis.utils.Index.update>` for many resources at once.  Positions
+        sharing a value are added to the :class:`Index <unis.utils.Index>` together.  When a
+        position appears more than once, the last value given for it is kept.
+        """
+        groups = {}
+        for index, value in dict(pairs).items():
+            if index in self._reverse:
+                if self._reverse[index] == value:
+                    continue
+                self.remove(index)
+            groups.setdefault(value, []).append(index)
+            self._reverse[index] = value
+        for value, indices in groups.items():
+            self._get_block(value).extend(indices)
     def remove(self, index):
         """
         :param int index: Position of the resource in the collection.
@@ -120,6 +142,16 @@ class Index(object):
             self._block_keys.remove(block_name)
             del self._blocks[block_name]
             del block
+    def remap(self, mapping):
+        """
+        :param dict mapping: Dictionary from old resource positions to new positions.
+        
+        Renumber the resource positions held by the :class:`Index <unis.utils.Index>`,
+        used when the owning collection compacts its storage.
+        """
+        self._reverse = {mapping[i]:v for i,v in self._reverse.items()}
+        for block in self._blocks.values():
+            block._ls = dict.fromkeys(mapping[i] for i in block._ls)
     def _get_block(self, k):
         if k in self._blocks:
             return self._blocks[k]
@@ -189,13 +221,33 @@ class UniqueIndex(object):
         Takes a given index and associates it with a specified value in the
         :class:`UniqueIndex <unis.utils.UniqueIndex>`.
         """
-        if not value:
-            self._reverse[index] = value
-            return
-        if value in self._index and self._index[value] != index:
+        if value and value in self._index and self._index[value] != index:
             raise CollectionIndexError("index_{} conflict - {}".format(self.key, value))
+        old = self._reverse.get(index, None)
+        if old == value and index in self._reverse:
+            return
+        if old and self._index.get(old, None) == index:
+            del self._index[old]
         self._reverse[index] = value
-        self._index[value] = index
+        if value:
+            self._index[value] = index
+    def update_many(self, pairs):
+        """
+        :param pairs: Position and value pairs to associate.
+        :type pairs: list[tuple(int, any)]
+        :raises CollectionIndexError: If a value is already associated with another position.
+        
+        As :meth:`UniqueIndex.update <unis.utils.UniqueIndex.update>` for many resources at once.
+        """
+        for index, value in pairs:
+            if value and value in self._index and self._index[value] != index:
+                raise CollectionIndexError("index_{} conflict - {}".format(self.key, value))
+            old = self._reverse.get(index, None)
+            if old and self._index.get(old, None) == index:
+                del self._index[old]
+            self._reverse[index] = value
+            if value:
+                self._index[value] = index
     def remove(self, index):
         """
         :param int index: Position of the resource in the collection.
@@ -210,3 +262,12 @@ class UniqueIndex(object):
         except KeyError: pass
         try: del self._index[v]
         except KeyError: pass
+    def remap(self, mapping):
+        """
+        :param dict mapping: Dictionary from old resource positions to new positions.
+        
+        Renumber the resource positions held by the :class:`UniqueIndex <unis.utils.UniqueIndex>`,
+        used when the owning collection compacts its storage.
+        """
+        self._reverse = {mapping[i]:v for i,v in self._reverse.items()}
+        self._index = {v:mapping[i] for v,i in self._index.items()}
@@ -0,0 +1,51 @@
+"""
+JSON encoding used by the client, models, and services.  The fastest available
+implementation is selected at import time: ``orjson``, then ``ujson``, falling back
+to the standard library.  :func:`dumps` always produces ``bytes`` and :func:`loads`
+accepts ``bytes`` or ``str`` so payloads need not be transcoded between the two.
+Non-finite numbers (``NaN`` and infinities) are encoded as ``null`` by every
+implementation, as they have no representation in JSON.
+"""
+import json, math
+
+DecodeError = ValueError
+
+def _finite(v):
+    if isinstance(v, float):
+        return v if math.isfinite(v) else None
+    if isinstance(v, dict):
+        return {k: _finite(x) for k,x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [_finite(x) for x in v]
+    return v
+
+try:
+    import orjson
+    name = "orjson"
+    def dumps(v):
+        return orjson.dumps(v, option=orjson.OPT_NON_STR_KEYS)
+    loads = orjson.loads
+except ImportError:
+    try:
+        import ujson
+        name = "ujson"
+        _OPTS = {'ensure_ascii': False, 'escape_forward_slashes': False}
+        try:
+            ujson.dumps(0.0, allow_nan=False, **_OPTS)
+            _OPTS['allow_nan'] = False
+        except TypeError:
+            pass
+        def dumps(v):
+            try:
+                return ujson.dumps(v, **_OPTS).encode('utf-8')
+            except (OverflowError, ValueError):
+                return ujson.dumps(_finite(v), **_OPTS).encode('utf-8')
+        loads = ujson.loads
+    except ImportError:
+        name = "json"
+        def dumps(v):
+            try:
+                return json.dumps(v, separators=(',', ':'), allow_nan=False).encode('utf-8')
+            except ValueError:
+                return json.dumps(_finite(v), separators=(',', ':'), allow_nan=False).encode('utf-8')
+        loads = json.loads